@@ -1,15 +1,187 @@
+import asyncio
 import json
+import os
+import random
 import time
-from slack_sdk import WebClient
+import unicodedata
+import aiohttp
+from slack_sdk.web.async_client import AsyncWebClient
 from slack_sdk.errors import SlackApiError
+import metrics
+from consumos_store import ConsumosStore
+from delivery_ledger import DeliveryLedger, content_hash
 
 # --- CONFIGURACIÓN ---
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN") 
+SLACK_API_URL = os.getenv("SLACK_API_URL", "https://slack.com/api/")
 JSON_FILE_PATH = "user_id.json"
 CONSUMOS_TXT_PATH = "output_txt/consumos.txt"
+CONSUMOS_JSONL_PATH = "output_txt/consumos.jsonl"
+REGISTRO_ENVIOS_PATH = "output_txt/envios.sqlite3"
+
+# Envíos simultáneos como máximo (conexiones abiertas contra Slack).
+MAX_ENVIOS_CONCURRENTES = 8
+# Límite por método: (solicitudes por segundo sostenidas, ráfaga máxima).
+# chat.postMessage es de tier especial: ~1 msg/s por canal, con ráfagas cortas;
+# como cada vendedor es un canal (DM) distinto, el límite efectivo es el del workspace.
+SLACK_RATE_LIMITS = {
+    "chat.postMessage": (3.0, 10),
+    # Tier 3 (~50 por minuto): abrir el DM para subir archivos.
+    "conversations.open": (0.8, 5),
+    # files_upload_v2 hace tres llamadas (URL, subida y completeUploadExternal) por captura.
+    "files.upload": (1.0, 4),
+}
+# Subidas de capturas simultáneas como máximo (acota también las imágenes en memoria).
+MAX_SUBIDAS_CONCURRENTES = 4
+MAX_REINTENTOS = 5
+BACKOFF_BASE_SEGUNDOS = 1.0
+BACKOFF_MAX_SEGUNDOS = 30.0
 # --- FIN DE LA CONFIGURACIÓN ---
 
 
+class LimitadorTokenBucket:
+    """
+    Token bucket asíncrono para un método de la API de Slack. Permite ráfagas
+    de hasta `capacidad` solicitudes y luego `tasa` solicitudes por segundo.
+    Un 429 pausa el bucket completo durante el Retry-After indicado por Slack.
+    """
+    def __init__(self, tasa, capacidad):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = float(capacidad)
+        self.ultima_recarga = time.monotonic()
+        self.pausado_hasta = 0.0
+        self._lock = asyncio.Lock()
+
+    def _recargar(self, ahora):
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultima_recarga) * self.tasa)
+        self.ultima_recarga = ahora
+
+    async def adquirir(self):
+        async with self._lock:
+            while True:
+                ahora = time.monotonic()
+                if ahora < self.pausado_hasta:
+                    await asyncio.sleep(self.pausado_hasta - ahora)
+                    continue
+                self._recargar(ahora)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.tasa)
+
+    def pausar(self, segundos):
+        """Detiene todas las solicitudes del método por `segundos` (Retry-After)."""
+        self.pausado_hasta = max(self.pausado_hasta, time.monotonic() + segundos)
+        self.tokens = 0.0
+
+
+def _espera_con_jitter(intento):
+    """Backoff exponencial con jitter completo: entre 0 y base * 2^intento, acotado."""
+    return random.uniform(0, min(BACKOFF_MAX_SEGUNDOS, BACKOFF_BASE_SEGUNDOS * (2 ** intento)))
+
+
+async def _llamada_medida(nombre_span, metodo, kwargs):
+    """Una llamada HTTP a Slack; su latencia se registra aunque falle."""
+    inicio = time.perf_counter()
+    try:
+        return await metodo(**kwargs)
+    finally:
+        metrics.observe(nombre_span, time.perf_counter() - inicio)
+        metrics.count("slack_calls")
+
+
+async def llamar_slack(limitador, metodo, **kwargs):
+    """
+    Llama a un método de AsyncWebClient respetando el limitador. Ante un 429
+    espera el Retry-After (más un pequeño jitter) y reintenta; ante errores de
+    red reintenta con backoff exponencial. Otros errores de la API se propagan.
+    """
+    nombre_span = f"slack.{metodo.__name__}"
+    for intento in range(MAX_REINTENTOS + 1):
+        await limitador.adquirir()
+        try:
+            return await _llamada_medida(nombre_span, metodo, kwargs)
+        except SlackApiError as e:
+            if e.response.status_code == 429:
+                metrics.count("slack_rate_limited")
+            if e.response.status_code != 429 or intento == MAX_REINTENTOS:
+                raise
+            retry_after = float(e.response.headers.get("Retry-After", 1))
+            print(f"  🟡 Límite de Slack alcanzado. Reintentando en {retry_after:.0f}s...")
+            limitador.pausar(retry_after + random.uniform(0, 1))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            metrics.count("slack_network_errors")
+            if intento == MAX_REINTENTOS:
+                raise
+            espera = _espera_con_jitter(intento)
+            print(f"  🟡 Error de red ({e.__class__.__name__}). Reintentando en {espera:.1f}s...")
+            await asyncio.sleep(espera)
+
+
+# --- DIRECTORIO DE VENDEDORES ---
+PREFIJO_COMENTARIO = "_comment_"
+
+
+def normalizar_nombre(nombre):
+    """
+    Clave de búsqueda de un nombre: sin acentos, en mayúsculas, sin puntos y
+    con un único espacio entre palabras ('Germán C. Celis' -> 'GERMAN C CELIS').
+    Las palabras y las iniciales no se tocan: 'ANA A ACOSTA' y 'ANA B ACOSTA'
+    siguen siendo personas distintas.
+    """
+    sin_acentos = "".join(c for c in unicodedata.normalize("NFKD", nombre) if not unicodedata.combining(c))
+    return " ".join(sin_acentos.replace(".", " ").upper().split())
+
+
+class DirectorioVendedores:
+    """
+    Índice de user_id.json construido una sola vez: la búsqueda es un acceso
+    a diccionario sobre el nombre normalizado, que solo perdona diferencias de
+    acentos, mayúsculas, puntos y espacios. No se adivina: un nombre que no
+    coincide queda en `no_encontrados` para informarlo, porque un reporte
+    enviado a la persona equivocada expone su resumen de tarjeta.
+    Las entradas '_comment_<Nombre>' marcan vendedores omitidos.
+    """
+    def __init__(self, data_vendedores):
+        self.por_nombre = {}   # nombre normalizado -> (clave del JSON, info)
+        self.omitidos = {}     # nombre normalizado -> comentario
+        self.no_encontrados = []
+
+        for clave, info in data_vendedores.items():
+            if clave.startswith(PREFIJO_COMENTARIO):
+                self.omitidos[normalizar_nombre(clave[len(PREFIJO_COMENTARIO):])] = info
+            else:
+                # Como la búsqueda lineal anterior, gana la primera clave repetida.
+                self.por_nombre.setdefault(normalizar_nombre(clave), (clave, info))
+
+    @classmethod
+    def desde_json(cls, ruta_json):
+        with open(ruta_json, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def buscar(self, nombre):
+        """
+        Devuelve (info, clave_json) del vendedor, o (None, None) si no existe o
+        está omitido. Los nombres no encontrados quedan en `no_encontrados`.
+        """
+        nombre_normalizado = normalizar_nombre(nombre)
+        if nombre_normalizado in self.omitidos:
+            return None, None
+
+        encontrado = self.por_nombre.get(nombre_normalizado)
+        if encontrado is None:
+            if nombre not in self.no_encontrados:
+                self.no_encontrados.append(nombre)
+            return None, None
+
+        clave, info = encontrado
+        return info, clave
+
+    def es_omitido(self, nombre):
+        return normalizar_nombre(nombre) in self.omitidos
+
+
 def parsear_consumos(ruta_archivo_txt):
     """
     Lee un archivo de texto con múltiples reportes y los separa en un
@@ -40,64 +212,250 @@ def parsear_consumos(ruta_archivo_txt):
     return reportes
 
 
-def enviar_reportes_de_texto():
+def leer_reportes_indexados(ruta_jsonl):
     """
-    Función principal que orquesta la lectura del TXT y el envío a Slack.
+    Arma los reportes a partir del JSONL indexado que genera save_to_jsonl.
+    Cada vendedor se lee saltando directo a su rango de bytes (archivo
+    mapeado en memoria), sin recorrer el resto del archivo.
+    Devuelve (reportes, mes del resumen 'AAAA-MM').
     """
-    reportes_por_vendedor = parsear_consumos(CONSUMOS_TXT_PATH)
-    if not reportes_por_vendedor:
-        print("❌ No se encontraron reportes para procesar. El script ha terminado.")
-        return
+    print(f"📄 Leyendo reportes indexados desde '{ruta_jsonl}'...")
+    reportes = {}
+    with ConsumosStore(ruta_jsonl) as store:
+        for nombre_vendedor in store.vendors():
+            reportes[nombre_vendedor] = store.report_text(nombre_vendedor)
+            print(f"   - Reporte de '{nombre_vendedor}' extraído.")
+        mes_resumen = store.statement_month
+    return reportes, mes_resumen
 
-    try:
-        with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-            data_vendedores = json.load(f)
-        print(f"✅ Datos de vendedores cargados desde '{JSON_FILE_PATH}'.")
-    except FileNotFoundError:
-        print(f"🔴 ERROR CRÍTICO: No se encontró el archivo JSON: '{JSON_FILE_PATH}'.")
-        return
 
-    client = WebClient(token=SLACK_BOT_TOKEN)
-    print("🤖 Conectando a Slack...")
+def formatear_mensaje(vendor_name_from_txt, reporte_texto):
+    return (
+        f"¡Hola {vendor_name_from_txt.title()}! 👋 Aquí tienes tu resumen de consumos de este mes:\n\n"
+        f"```\n"
+        f"{reporte_texto}\n"
+        f"```"
+    )
+
+
+async def _enviar_reporte(client, limitador, semaforo, registro, mes_resumen, vendor_name_from_txt, user_id, mensaje_formateado):
+    """
+    Envía el reporte de un vendedor y lo anota en el registro de envíos.
+    Devuelve True si Slack lo aceptó.
+    """
+    async with semaforo:
+        try:
+            print(f"  Enviando reporte a {vendor_name_from_txt} (ID: {user_id})...")
+            respuesta = await llamar_slack(limitador, client.chat_postMessage, channel=user_id, text=mensaje_formateado)
+            # Se registra inmediatamente: si el proceso se corta, este envío no se repite.
+            registro.record(vendor_name_from_txt, mes_resumen, content_hash(mensaje_formateado), user_id, respuesta.get("ts"))
+            print(f"  ✅ ¡Éxito! Reporte enviado a {vendor_name_from_txt}.")
+            return True
+        except SlackApiError as e:
+            print(f"  🔴 ¡ERROR al enviar a {vendor_name_from_txt}! Causa: {e.response['error']}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"  🔴 ¡ERROR al enviar a {vendor_name_from_txt}! Causa: {e.__class__.__name__}")
+        return False
+
+
+def _destinatario(directorio, vendor_name_from_txt):
+    """
+    UID de Slack del vendedor, o None (con el motivo impreso) si no hay que enviarle nada.
+    """
+    vendedor_encontrado_info, _ = directorio.buscar(vendor_name_from_txt)
+
+    if directorio.es_omitido(vendor_name_from_txt):
+        print(f"🟡 Omitiendo a '{vendor_name_from_txt}' (marcado como omitido en el JSON).")
+        return None
+
+    if not (vendedor_encontrado_info and vendedor_encontrado_info.get("send_message")):
+        print(f"🟡 Omitiendo a '{vendor_name_from_txt}' (no encontrado en JSON o envío desactivado).")
+        return None
+
+    user_id = vendedor_encontrado_info.get("UID")
+    if not user_id:
+        print(f"🔴 Omitiendo a '{vendor_name_from_txt}' (no tiene UID en el JSON).")
+        return None
+    return user_id
+
 
-    print("\n--- Empezando a enviar reportes por Slack ---")
+async def enviar_reportes_async(reportes_por_vendedor, directorio, registro, mes_resumen=None):
+    """
+    Envía todos los reportes en paralelo, con concurrencia acotada y un token
+    bucket ajustado al tier de chat.postMessage en lugar de una pausa fija.
+    Los reportes que el registro ya tiene como entregados (mismo vendedor, mes
+    y contenido) no se vuelven a enviar, así una corrida cortada se retoma.
+    """
+    envios = []
     for vendor_name_from_txt, reporte_texto in reportes_por_vendedor.items():
-        
-        # --- INICIO DE LA MODIFICACIÓN ---
-        # Búsqueda inteligente que ignora mayúsculas/minúsculas y espacios
-        vendedor_encontrado_info = None
-        for json_key, json_info in data_vendedores.items():
-            if json_key.strip().upper() == vendor_name_from_txt.strip().upper():
-                vendedor_encontrado_info = json_info
-                break # Detenemos la búsqueda cuando encontramos la primera coincidencia
-        # --- FIN DE LA MODIFICACIÓN ---
-
-        if not (vendedor_encontrado_info and vendedor_encontrado_info.get("send_message")):
-            print(f"🟡 Omitiendo a '{vendor_name_from_txt}' (no encontrado en JSON o envío desactivado).")
+        user_id = _destinatario(directorio, vendor_name_from_txt)
+        if not user_id:
             continue
 
-        user_id = vendedor_encontrado_info.get("UID")
-        if not user_id:
-            print(f"🔴 Omitiendo a '{vendor_name_from_txt}' (no tiene UID en el JSON).")
+        mensaje_formateado = formatear_mensaje(vendor_name_from_txt, reporte_texto)
+        if registro.already_delivered(vendor_name_from_txt, mes_resumen, content_hash(mensaje_formateado)):
+            print(f"⏭️  Omitiendo a '{vendor_name_from_txt}' (este reporte ya fue enviado).")
             continue
 
-        mensaje_formateado = (
-            f"¡Hola {vendor_name_from_txt.title()}! 👋 Aquí tienes tu resumen de consumos de este mes:\n\n"
-            f"```\n"
-            f"{reporte_texto}\n"
-            f"```"
+        envios.append((vendor_name_from_txt, user_id, mensaje_formateado))
+
+    limitador = LimitadorTokenBucket(*SLACK_RATE_LIMITS["chat.postMessage"])
+    semaforo = asyncio.Semaphore(MAX_ENVIOS_CONCURRENTES)
+
+    # Una sola sesión HTTP reutiliza las conexiones entre envíos.
+    async with aiohttp.ClientSession() as session:
+        # Los reintentos los maneja llamar_slack, no los handlers por defecto del cliente.
+        client = AsyncWebClient(token=SLACK_BOT_TOKEN, base_url=SLACK_API_URL, session=session, retry_handlers=[])
+        print("🤖 Conectando a Slack...")
+
+        print("\n--- Empezando a enviar reportes por Slack ---")
+        resultados = await asyncio.gather(*(
+            _enviar_reporte(client, limitador, semaforo, registro, mes_resumen, nombre, user_id, mensaje)
+            for nombre, user_id, mensaje in envios
+        ))
+    return sum(resultados)
+
+
+# --- SUBIDA DE CAPTURAS ---
+async def _canal_directo(client, limitador, user_id, canales):
+    """
+    ID del DM con el usuario: files_upload_v2 necesita un canal, no un UID.
+    Se abre una vez por usuario y queda cacheado en `canales`.
+    """
+    if user_id not in canales:
+        respuesta = await llamar_slack(limitador, client.conversations_open, users=user_id)
+        canales[user_id] = respuesta["channel"]["id"]
+    return canales[user_id]
+
+
+async def _subir_captura(client, limitadores, semaforo, registro, mes_resumen, canales,
+                         vendor_name, user_id, nombre_archivo, datos):
+    """
+    Sube la captura (bytes JPEG) al DM del vendedor y la anota en el registro.
+    Libera el lugar del semáforo tomado por subir_capturas_async al terminar.
+    Devuelve True si Slack la aceptó.
+    """
+    try:
+        print(f"  Subiendo captura de {vendor_name} (ID: {user_id})...")
+        canal = await _canal_directo(client, limitadores["conversations.open"], user_id, canales)
+        respuesta = await llamar_slack(
+            limitadores["files.upload"], client.files_upload_v2,
+            channel=canal, file=datos, filename=nombre_archivo, title=os.path.splitext(nombre_archivo)[0],
+            initial_comment=f"¡Hola {vendor_name.title()}! 👋 Aquí tienes la captura de tus consumos de este mes.",
         )
+        archivo_id = (respuesta.get("files") or [{}])[0].get("id")
+        registro.record(vendor_name, mes_resumen, content_hash(datos), canal, archivo_id)
+        print(f"  ✅ ¡Éxito! Captura enviada a {vendor_name}.")
+        return True
+    except SlackApiError as e:
+        print(f"  🔴 ¡ERROR al subir la captura de {vendor_name}! Causa: {e.response['error']}")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"  🔴 ¡ERROR al subir la captura de {vendor_name}! Causa: {e.__class__.__name__}")
+    finally:
+        semaforo.release()
+    return False
 
-        try:
-            print(f"  Enviando reporte a {vendor_name_from_txt} (ID: {user_id})...")
-            client.chat_postMessage(channel=user_id, text=mensaje_formateado)
-            print(f"  ✅ ¡Éxito! Reporte enviado a {vendor_name_from_txt}.")
-        except SlackApiError as e:
-            print(f"  🔴 ¡ERROR al enviar a {vendor_name_from_txt}! Causa: {e.response['error']}")
-        
-        time.sleep(1)
 
-    print("\n✅ Proceso completado. Todos los reportes han sido procesados.")
+async def subir_capturas_async(capturas, directorio, registro, mes_resumen=None):
+    """
+    Sube cada captura al DM de su vendedor con files_upload_v2 apenas está
+    lista. `capturas` es un iterable asíncrono de (vendedor, nombre de
+    archivo, bytes JPEG): mientras se renderiza la siguiente, las anteriores
+    ya se están subiendo. El semáforo se toma antes de pedir la próxima
+    captura, así nunca hay más de MAX_SUBIDAS_CONCURRENTES imágenes en memoria.
+    """
+    limitadores = {metodo: LimitadorTokenBucket(*SLACK_RATE_LIMITS[metodo]) for metodo in ("conversations.open", "files.upload")}
+    semaforo = asyncio.Semaphore(MAX_SUBIDAS_CONCURRENTES)
+    canales = {}
+    tareas = []
+
+    async with aiohttp.ClientSession() as session:
+        client = AsyncWebClient(token=SLACK_BOT_TOKEN, base_url=SLACK_API_URL, session=session, retry_handlers=[])
+        print("\n--- Empezando a subir capturas a Slack ---")
+        await semaforo.acquire()
+        async for vendor_name, nombre_archivo, datos in capturas:
+            user_id = _destinatario(directorio, vendor_name)
+            if not user_id:
+                continue
+            if registro.already_delivered(vendor_name, mes_resumen, content_hash(datos)):
+                print(f"⏭️  Omitiendo la captura '{nombre_archivo}' (ya fue enviada).")
+                continue
+            tareas.append(asyncio.create_task(_subir_captura(
+                client, limitadores, semaforo, registro, mes_resumen, canales, vendor_name, user_id, nombre_archivo, datos
+            )))
+            await semaforo.acquire()
+        semaforo.release()
+        resultados = await asyncio.gather(*tareas)
+    return sum(resultados)
+
+
+def _cargar_directorio():
+    try:
+        directorio = DirectorioVendedores.desde_json(JSON_FILE_PATH)
+        print(f"✅ Datos de vendedores cargados desde '{JSON_FILE_PATH}'.")
+        return directorio
+    except FileNotFoundError:
+        print(f"🔴 ERROR CRÍTICO: No se encontró el archivo JSON: '{JSON_FILE_PATH}'.")
+        return None
+
+
+def _informar_no_encontrados(directorio):
+    if directorio.no_encontrados:
+        print("\n🔴 Vendedores del reporte sin coincidencia en el JSON:")
+        for nombre in directorio.no_encontrados:
+            print(f"   - {nombre}")
+
+
+def enviar_capturas(capturas, mes_resumen=None):
+    """
+    Sube las capturas de un iterable asíncrono (ver subir_capturas_async) y
+    devuelve cuántas se enviaron. Ningún archivo pasa por disco.
+    """
+    directorio = _cargar_directorio()
+    if directorio is None:
+        return 0
+
+    with DeliveryLedger(REGISTRO_ENVIOS_PATH) as registro:
+        enviadas = asyncio.run(subir_capturas_async(capturas, directorio, registro, mes_resumen))
+
+    _informar_no_encontrados(directorio)
+    print(f"\n✅ Proceso completado. {enviadas} capturas enviadas.")
+    return enviadas
+
+
+def enviar_reportes_de_texto():
+    """
+    Función principal que orquesta la lectura del TXT y el envío a Slack.
+    """
+    if os.path.exists(CONSUMOS_JSONL_PATH):
+        reportes_por_vendedor, mes_resumen = leer_reportes_indexados(CONSUMOS_JSONL_PATH)
+    else:
+        reportes_por_vendedor, mes_resumen = parsear_consumos(CONSUMOS_TXT_PATH), None
+    return enviar_reportes(reportes_por_vendedor, mes_resumen)
+
+
+def enviar_reportes(reportes_por_vendedor, mes_resumen=None):
+    """
+    Envía reportes ya armados ({vendedor: texto}) y devuelve cuántos se
+    enviaron. Lo usan tanto el script como el pipeline de un solo proceso,
+    que le pasa los reportes en memoria sin pasar por consumos.txt.
+    """
+    if not reportes_por_vendedor:
+        print("❌ No se encontraron reportes para procesar. El script ha terminado.")
+        return 0
+
+    directorio = _cargar_directorio()
+    if directorio is None:
+        return 0
+
+    with DeliveryLedger(REGISTRO_ENVIOS_PATH) as registro:
+        enviados = asyncio.run(enviar_reportes_async(reportes_por_vendedor, directorio, registro, mes_resumen))
+
+    _informar_no_encontrados(directorio)
+
+    print(f"\n✅ Proceso completado. {enviados} reportes enviados.")
+    return enviados
 
 if __name__ == "__main__":
-    enviar_reportes_de_texto()
\ No newline at end of file
+    enviar_reportes_de_texto()
+    metrics.write_report()
@@ -0,0 +1,179 @@
+"""
+End-to-end benchmark on synthetic statements of growing size.
+
+For each size, a statement is generated with benchmarks.synthetic_statement
+and every stage is timed (best of --repeat):
+
+    extract_cold          extract_transactions_from_pdf, empty layout cache
+    extract_warm          extract_transactions_from_pdf, warm layout cache
+    find_person_sections  PDFProcessor.find_person_sections
+    generate_image        ImageGenerator.generate_image for every section
+    save_to_excel         save_to_excel
+    save_to_txt           save_to_txt
+    send_reports          enviar_reportes_async against a local Slack stub
+
+Results are written as JSON so runs can be compared as statements grow.
+The sender uses an unthrottled token bucket unless --real-rate-limits is
+given; otherwise the run time is just the configured Slack rate.
+
+Run from the repository root:
+    python -m benchmarks.bench_end_to_end --salespeople 8 40 120 --output bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+import Envio_Automatico_Detalle as envio
+from benchmarks.slack_stub import SlackStub
+from benchmarks.synthetic_statement import generate_statement
+from delivery_ledger import DeliveryLedger
+from pdf_extractos_Capturas import ImageGenerator, PDFProcessor
+from pdf_extractos_Excel_txt import extract_transactions_from_pdf, save_to_excel, save_to_jsonl, save_to_txt
+from pdf_layout import LayoutConfig
+
+DEFAULT_SIZES = (8, 40, 120)
+REPEAT = 3
+
+
+def _best_of(repeat, func, setup=None):
+    """
+    Minimum wall time of `repeat` calls to func(), with setup() run untimed
+    before each call. Output printed by the code under test is discarded.
+    """
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _clear_layout_cache():
+    shutil.rmtree(LayoutConfig.CACHE_DIR, ignore_errors=True)
+
+
+async def _send_reports(reportes, mes_resumen, ledger_path, real_rate_limits):
+    directorio = envio.DirectorioVendedores({
+        nombre: {"UID": f"U{idx:08d}", "send_message": True} for idx, nombre in enumerate(reportes)
+    })
+    async with SlackStub() as stub:
+        envio.SLACK_API_URL = stub.base_url
+        envio.SLACK_BOT_TOKEN = "xoxb-benchmark"
+        if not real_rate_limits:
+            envio.SLACK_RATE_LIMITS = {"chat.postMessage": (1e6, 1e6)}
+        with DeliveryLedger(ledger_path) as registro:
+            enviados = await envio.enviar_reportes_async(reportes, directorio, registro, mes_resumen)
+    assert enviados == len(reportes), "Every report must reach the stub"
+
+
+def bench_statement(salespeople, work_dir, repeat=REPEAT, real_rate_limits=False, seed=0):
+    """
+    Generates one statement with `salespeople` sections and times every stage.
+    """
+    pdf_path = os.path.join(work_dir, f"statement_{salespeople}.pdf")
+    statement = generate_statement(pdf_path, salespeople=salespeople, seed=seed)
+    output_dir = os.path.join(work_dir, f"output_{salespeople}")
+    timings = {}
+
+    timings["extract_cold"] = _best_of(repeat, lambda: extract_transactions_from_pdf(pdf_path),
+                                       setup=_clear_layout_cache)
+    timings["extract_warm"] = _best_of(repeat, lambda: extract_transactions_from_pdf(pdf_path))
+    dataframe, latest_date = extract_transactions_from_pdf(pdf_path)
+
+    processor = PDFProcessor(pdf_path)
+    try:
+        timings["find_person_sections"] = _best_of(repeat, processor.find_person_sections)
+        sections = processor.find_person_sections()
+
+        def render_all():
+            image_gen = ImageGenerator(processor.document, os.path.join(output_dir, "capturas"))
+            for section in sections:
+                image_gen.generate_image(section)
+        timings["generate_image"] = _best_of(repeat, render_all)
+    finally:
+        processor.close()
+
+    timings["save_to_excel"] = _best_of(repeat, lambda: save_to_excel(dataframe, latest_date, output_folder=output_dir))
+    timings["save_to_txt"] = _best_of(repeat, lambda: save_to_txt(dataframe, latest_date, output_folder=output_dir))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_to_jsonl(dataframe, latest_date, output_folder=output_dir)
+        reportes, mes_resumen = envio.leer_reportes_indexados(os.path.join(output_dir, "consumos.jsonl"))
+    ledger_path = os.path.join(output_dir, "envios.sqlite3")
+
+    def reset_ledger():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(ledger_path + suffix):
+                os.remove(ledger_path + suffix)
+    timings["send_reports"] = _best_of(
+        repeat, lambda: asyncio.run(_send_reports(reportes, mes_resumen, ledger_path, real_rate_limits)),
+        setup=reset_ledger,
+    )
+
+    return {
+        **statement,
+        "rows": len(dataframe),
+        "sections": len(sections),
+        "timings": {stage: round(seconds, 6) for stage, seconds in timings.items()},
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=REPEAT, real_rate_limits=False):
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    previous_dir = os.getcwd()
+    # La caché de layout es relativa al directorio actual: se aísla en work_dir.
+    os.chdir(work_dir)
+    try:
+        statements = []
+        for salespeople in sizes:
+            result = bench_statement(salespeople, work_dir, repeat, real_rate_limits)
+            statements.append(result)
+            print(f"{salespeople:5d} salespeople, {result['pages']:4d} pages: "
+                  + ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["timings"].items()))
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": fitz.VersionBind,
+            "cpu_count": os.cpu_count(),
+        },
+        "repeat": repeat,
+        "real_rate_limits": real_rate_limits,
+        "statements": statements,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta sobre resúmenes sintéticos.")
+    parser.add_argument("--salespeople", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Tamaños a medir (cantidad de vendedores por resumen).")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--real-rate-limits", action="store_true",
+                        help="Usa los límites de SLACK_RATE_LIMITS en lugar de un token bucket sin límite.")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto, se imprime).")
+    args = parser.parse_args()
+
+    results = run_suite(args.salespeople, args.repeat, args.real_rate_limits)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results saved to {args.output}")
+    else:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: grouping the words of a synthetic 5,000-word page into lines.
+
+Compares the previous per-line scan of extract_transactions_from_pdf
+(every word checked against every line found so far) with the
+bisection over line keys in pdf_layout.group_words_into_lines,
+which follows the same rules.
+
+Run from the repository root:
+    python -m benchmarks.bench_line_grouping
+"""
+import random
+import timeit
+
+from pdf_layout import group_words_into_lines
+
+WORD_COUNT = 5000
+WORDS_PER_LINE = 8
+Y_TOLERANCE = 5
+REPEAT = 5
+
+
+def make_synthetic_page(word_count=WORD_COUNT, seed=0):
+    """
+    Words laid out as table rows 12 pt apart, with small baseline jitter,
+    in the (x0, y0, x1, y1, "word", block_no, line_no, word_no) shape of PyMuPDF.
+    """
+    rng = random.Random(seed)
+    words = []
+    for idx in range(word_count):
+        row, col = divmod(idx, WORDS_PER_LINE)
+        x0 = 36 + col * 60 + rng.uniform(-1, 1)
+        y0 = 40 + row * 12 + rng.uniform(-0.5, 0.5)
+        words.append((x0, y0, x0 + 50, y0 + 9, f"w{idx}", 0, row, col))
+    rng.shuffle(words)
+    return words
+
+
+def group_lines_legacy(words, y_tolerance=Y_TOLERANCE):
+    """
+    The line grouping previously inlined in extract_transactions_from_pdf.
+    """
+    lines_grouped_by_y = {}
+    for word_info in words:
+        word_y0 = word_info[1]
+        found_line = False
+        for line_y_key in lines_grouped_by_y.keys():
+            if abs(word_y0 - line_y_key) < y_tolerance:
+                lines_grouped_by_y[line_y_key].append(word_info)
+                found_line = True
+                break
+        if not found_line:
+            lines_grouped_by_y[word_y0] = [word_info]
+    return [sorted(lines_grouped_by_y[y], key=lambda x: x[0]) for y in sorted(lines_grouped_by_y)]
+
+
+def main():
+    words = make_synthetic_page()
+
+    legacy_lines = group_lines_legacy(words)
+    sweep_lines = group_words_into_lines(words, Y_TOLERANCE)
+    assert legacy_lines == sweep_lines, "Both implementations must build the same lines"
+
+    legacy = min(timeit.repeat(lambda: group_lines_legacy(words), number=1, repeat=REPEAT))
+    sweep = min(timeit.repeat(lambda: group_words_into_lines(words, Y_TOLERANCE), number=1, repeat=REPEAT))
+
+    print(f"{WORD_COUNT} words, {len(sweep_lines)} lines (best of {REPEAT})")
+    print(f"  legacy scan    : {legacy * 1000:9.2f} ms")
+    print(f"  bisection      : {sweep * 1000:9.2f} ms")
+    print(f"  speedup        : {legacy / sweep:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
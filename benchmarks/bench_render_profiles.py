@@ -0,0 +1,143 @@
+"""
+Capture render profiles benchmark.
+
+A synthetic statement is generated with benchmarks.synthetic_statement and
+all of its sections are rendered once per profile in
+pdf_extractos_Capturas.Config.RENDER_PROFILES. For each profile it reports:
+
+    dpi              DPI the run rendered at (adaptive profiles pick their own)
+    pixels           pixels allocated by the clip renders (capture_pixels_rendered)
+    raster_bytes     bytes of those pixmaps (pixels x channels)
+    render_seconds   total time in ImageGenerator._render_clip
+    encode_seconds   total time in Pillow's save (JPEG/PNG/TIFF encoding)
+    total_seconds    best of --repeat for the whole render_sections call
+    file_bytes       total size of the files written
+
+Run from the repository root:
+    python -m benchmarks.bench_render_profiles --salespeople 40 --output profiles.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+import metrics
+from benchmarks.synthetic_statement import generate_statement
+from pdf_extractos_Capturas import Config, PDFProcessor, render_sections
+
+DEFAULT_SALESPEOPLE = 40
+REPEAT = 3
+
+
+def _directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def bench_profile(pdf_path, document, sections, profile, output_dir, repeat=REPEAT):
+    """
+    Renders every section with `profile` `repeat` times and keeps the
+    counters and spans of the fastest run.
+    """
+    best = None
+    for _ in range(repeat):
+        shutil.rmtree(output_dir, ignore_errors=True)
+        metrics.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            render_sections(pdf_path, document, sections, output_dir, profile=profile)
+            elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, metrics.snapshot())
+
+    elapsed, data = best
+    counters, spans = data["counters"], data["spans"]
+    captures = sorted(os.listdir(output_dir))
+    return {
+        "profile": profile,
+        "format": Config.RENDER_PROFILES[profile]["format"],
+        "dpi": _rendered_dpi(output_dir, captures),
+        "captures": len(captures),
+        "pixels": counters.get("capture_pixels_rendered", 0),
+        "raster_bytes": counters.get("capture_raster_bytes", 0),
+        "render_seconds": round(spans.get("capture.render", {}).get("total", 0.0), 6),
+        "encode_seconds": round(spans.get("capture.encode", {}).get("total", 0.0), 6),
+        "total_seconds": round(elapsed, 6),
+        "file_bytes": _directory_size(output_dir),
+    }
+
+
+def _rendered_dpi(output_dir, captures):
+    # El DPI queda grabado en cada archivo; se lee del primero.
+    from PIL import Image
+    if not captures:
+        return None
+    with Image.open(os.path.join(output_dir, captures[0])) as image:
+        dpi = image.info.get("dpi")
+    return round(float(dpi[0])) if dpi else None
+
+
+def run_suite(salespeople=DEFAULT_SALESPEOPLE, profiles=None, repeat=REPEAT):
+    profiles = profiles or list(Config.RENDER_PROFILES)
+    work_dir = tempfile.mkdtemp(prefix="bench_profiles_")
+    was_enabled = metrics.is_enabled()
+    metrics.enable()
+    try:
+        pdf_path = os.path.join(work_dir, f"statement_{salespeople}.pdf")
+        statement = generate_statement(pdf_path, salespeople=salespeople)
+        processor = PDFProcessor(pdf_path)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                sections = processor.find_person_sections()
+            results = []
+            for profile in profiles:
+                result = bench_profile(pdf_path, processor.document, sections, profile,
+                                       os.path.join(work_dir, profile), repeat)
+                results.append(result)
+                print(f"{profile:14s} {result['dpi'] or '-':>4} dpi: {result['pixels'] / 1e6:8.1f} Mpx, "
+                      f"render {result['render_seconds']:.3f}s, encode {result['encode_seconds']:.3f}s, "
+                      f"{result['file_bytes'] / 1e6:7.2f} MB")
+        finally:
+            processor.close()
+    finally:
+        if not was_enabled:
+            metrics.disable()
+        metrics.reset()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": fitz.VersionBind,
+            "cpu_count": os.cpu_count(),
+        },
+        "repeat": repeat,
+        "statement": {**statement, "sections": len(sections)},
+        "profiles": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara los perfiles de render de capturas: píxeles, tiempo de codificación y tamaño.")
+    parser.add_argument("--salespeople", type=int, default=DEFAULT_SALESPEOPLE,
+                        help="Cantidad de vendedores del resumen sintético.")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(Config.RENDER_PROFILES),
+                        help="Perfiles a medir (por defecto, todos).")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto, se imprime).")
+    args = parser.parse_args()
+
+    results = run_suite(args.salespeople, args.profiles, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results saved to {args.output}")
+    else:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
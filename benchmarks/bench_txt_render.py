@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: writing a 100,000-row consumos.txt.
+
+Compares the previous row-by-row renderer of save_to_txt (iterrows with
+per-value isinstance checks) with the column-wise renderer now used by
+save_to_txt. Both must produce byte-identical files.
+
+Run from the repository root:
+    python -m benchmarks.bench_txt_render
+"""
+import contextlib
+import io
+import os
+import random
+import tempfile
+import timeit
+from datetime import datetime
+
+import pandas as pd
+
+from pdf_extractos_Excel_txt import OUTPUT_COLUMNS, _prepare_txt_layout, save_to_txt
+
+ROW_COUNT = 100_000
+ROWS_PER_VENDOR = 40
+REPEAT = 3
+
+
+def make_synthetic_dataframe(row_count=ROW_COUNT, seed=0):
+    """
+    Rows shaped like the output of extract_transactions_from_pdf: a column
+    header per vendor, transactions, the total line and a blank separator.
+    """
+    rng = random.Random(seed)
+    rows = []
+    vendor = 0
+    while len(rows) < row_count:
+        rows.append(list(OUTPUT_COLUMNS))
+        for _ in range(ROWS_PER_VENDOR):
+            pesos = round(rng.uniform(100, 250000), 2)
+            dolares = round(rng.uniform(1, 900), 2) if rng.random() < 0.2 else ""
+            rows.append([f"{rng.randint(1, 28):02d}-Abr-25", f"MERCHANT {rng.randint(1, 999)} BUENOS AIRES",
+                         str(rng.randint(100000, 999999)), pesos, dolares])
+        rows.append(["", f"TOTAL CONSUMOS DE VENDEDOR {vendor} 1.234.567,89 12,34",
+                     "", round(rng.uniform(1e5, 1e7), 2), round(rng.uniform(0, 5000), 2)])
+        rows.append(["", "", "", "", ""])
+        vendor += 1
+    return pd.DataFrame(rows[:row_count], columns=OUTPUT_COLUMNS)
+
+
+def save_to_txt_legacy(dataframe, latest_date, output_path):
+    """
+    The row-by-row loop previously used by save_to_txt.
+    """
+    df_txt, col_widths = _prepare_txt_layout(dataframe)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if latest_date:
+            title_text = f"Monthly Consumption {latest_date.strftime('%B')}"
+            f.write(title_text.center(sum(col_widths.values())))
+            f.write("\n\n")
+        for index, row in df_txt.iterrows():
+            line_parts = []
+            for col_name in df_txt.columns:
+                value = row[col_name]
+                if isinstance(value, (int, float)):
+                    line_parts.append(f"{value:,.2f}".rjust(col_widths[col_name]))
+                else:
+                    line_parts.append(str(value if pd.notna(value) else "").ljust(col_widths[col_name]))
+            f.write("".join(line_parts).rstrip() + '\n')
+
+
+def main():
+    dataframe = make_synthetic_dataframe()
+    latest_date = datetime(2025, 4, 28)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, "legacy.txt")
+        columnar_path = os.path.join(tmp_dir, "consumos.txt")
+
+        def run_columnar():
+            with contextlib.redirect_stdout(io.StringIO()):
+                save_to_txt(dataframe, latest_date, output_folder=tmp_dir)
+
+        save_to_txt_legacy(dataframe, latest_date, legacy_path)
+        run_columnar()
+        with open(legacy_path, "rb") as a, open(columnar_path, "rb") as b:
+            assert a.read() == b.read(), "Both renderers must write the same file"
+
+        legacy = min(timeit.repeat(lambda: save_to_txt_legacy(dataframe, latest_date, legacy_path),
+                                   number=1, repeat=REPEAT))
+        columnar = min(timeit.repeat(run_columnar, number=1, repeat=REPEAT))
+
+    print(f"{len(dataframe)} rows (best of {REPEAT})")
+    print(f"  iterrows   : {legacy * 1000:9.2f} ms")
+    print(f"  column-wise: {columnar * 1000:9.2f} ms")
+    print(f"  speedup    : {legacy / columnar:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
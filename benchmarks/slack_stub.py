@@ -0,0 +1,81 @@
+"""
+Local stand-in for the Slack Web API, for benchmarking the sender without a
+workspace. Answers every POST /api/<method> with {"ok": true, "ts": ...} and,
+optionally, a 429 with Retry-After every `ratelimit_every` calls. The
+conversations.open and files_upload_v2 flows are answered too; uploaded
+bytes are kept in `uploads`.
+
+    async with SlackStub() as stub:
+        client = AsyncWebClient(token="xoxb-test", base_url=stub.base_url)
+"""
+import itertools
+import json
+
+from aiohttp import web
+
+
+class SlackStub:
+    def __init__(self, host="127.0.0.1", port=0, ratelimit_every=0, retry_after=1):
+        self.host = host
+        self.port = port
+        self.ratelimit_every = ratelimit_every
+        self.retry_after = retry_after
+        self.calls = []
+        self.uploads = {}
+        self.rate_limited = 0
+        self._counter = itertools.count(1)
+        self._runner = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/api/"
+
+    async def _handle(self, request):
+        call_number = next(self._counter)
+        if request.content_type == "application/json":
+            payload = await request.json()
+        else:
+            payload = dict(await request.post())
+        if self.ratelimit_every and call_number % self.ratelimit_every == 0:
+            self.rate_limited += 1
+            return web.json_response({"ok": False, "error": "ratelimited"}, status=429,
+                                     headers={"Retry-After": str(self.retry_after)})
+        method = request.match_info["method"]
+        self.calls.append((method, payload))
+        if method == "conversations.open":
+            return web.json_response({"ok": True, "channel": {"id": "D" + payload.get("users", "")}})
+        if method == "files.getUploadURLExternal":
+            file_id = f"F{len(self.calls):08d}"
+            return web.json_response({"ok": True, "file_id": file_id,
+                                      "upload_url": f"http://{self.host}:{self.port}/upload/{file_id}"})
+        if method == "files.completeUploadExternal":
+            files = json.loads(payload["files"]) if isinstance(payload.get("files"), str) else payload.get("files", [])
+            return web.json_response({"ok": True, "files": [{"id": f["id"]} for f in files]})
+        return web.json_response({"ok": True, "channel": payload.get("channel"), "ts": f"{len(self.calls)}.000100"})
+
+    async def _handle_upload(self, request):
+        self.uploads[request.match_info["file_id"]] = await request.read()
+        return web.Response(text="OK")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/api/{method}", self._handle)
+        app.router.add_post("/upload/{file_id}", self._handle_upload)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Con port=0 el sistema asigna un puerto libre.
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
@@ -0,0 +1,174 @@
+"""
+Synthetic credit card statements for benchmarks.
+
+Builds a PDF with the same structure as the bank statement the extractors
+are written for: a cover page, the DETALLE DEL CONSUMO section with one
+"Consumos <NAME>" block per salesperson (column header, transactions and
+TOTAL CONSUMOS DE line), page breaks that repeat the column header,
+salespeople with swapped currency columns, and the end markers
+("Impuestos, cargos e intereses", "Legales y avisos").
+
+Amounts are generated in cents, so every TOTAL line matches its rows exactly.
+
+Run from the repository root:
+    python -m benchmarks.synthetic_statement statement.pdf --salespeople 40
+"""
+import argparse
+import random
+
+import fitz  # PyMuPDF
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+TOP_MARGIN = 60
+BOTTOM_LIMIT = 800
+ROW_HEIGHT = 12
+COLUMN_X = {"FECHA": 36, "DESCRIPCIÓN": 95, "NRO. CUPÓN": 300, "FIRST_AMOUNT": 390, "SECOND_AMOUNT": 480}
+MONTHS = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+SALESPEOPLE = ["CARLOS A ROLDAN", "CRISTIAN A PALET", "T AGRESTA GREPPI", "LUCAS BRUSA",
+               "NOELIA MARTI", "JUAN ARRAMBIDE", "M RUSSO STAFFA", "GERMAN C CELIS"]
+FIRST_NAMES = ["ANA", "BRUNO", "CAROLINA", "DIEGO", "ELENA", "FEDERICO", "GABRIELA", "HUGO", "INES", "JAVIER"]
+LAST_NAMES = ["ACOSTA", "BENITEZ", "CASTRO", "DOMINGUEZ", "FERREYRA", "GIMENEZ", "HERRERA", "LEDESMA", "MOLINA", "SOSA"]
+SWAPPED_SALESPEOPLE = ("CRISTIAN A PALET",)
+
+
+def format_amount(cents):
+    """
+    Argentine format with a trailing minus for credits: 123456 -> '1.234,56'.
+    """
+    text = f"{abs(cents) / 100:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return text + "-" if cents < 0 else text
+
+
+def salesperson_names(count):
+    """
+    The first names are the ones of the real statement (including the swapped
+    one); the rest are unique generated names.
+    """
+    names = SALESPEOPLE[:count]
+    for idx in range(count - len(names)):
+        first, last = divmod(idx, len(LAST_NAMES))
+        initial = chr(ord("A") + (first // len(FIRST_NAMES)) % 26)
+        names.append(f"{FIRST_NAMES[first % len(FIRST_NAMES)]} {initial} {LAST_NAMES[last]}")
+    return names
+
+
+class _StatementWriter:
+    """
+    Keeps the current page and cursor while the statement is laid out.
+    """
+    def __init__(self):
+        self.doc = fitz.open()
+        self.page = None
+        self.y = TOP_MARGIN
+
+    def new_page(self, running_header=True):
+        self.page = self.doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.y = TOP_MARGIN
+        if running_header:
+            self.page.insert_text((36, 40), f"Banco Ejemplo  Página {self.doc.page_count}", fontsize=8)
+
+    def text(self, x, value, fontsize=8):
+        self.page.insert_text((x, self.y), value, fontsize=fontsize)
+
+    def ensure_space(self, limit=BOTTOM_LIMIT):
+        if self.y > limit:
+            self.new_page()
+            return True
+        return False
+
+    def column_header(self, swapped):
+        first, second = ("DÓLARES", "PESOS") if swapped else ("PESOS", "DÓLARES")
+        for column, label in (("FECHA", "FECHA"), ("DESCRIPCIÓN", "DESCRIPCIÓN"), ("NRO. CUPÓN", "NRO. CUPÓN"),
+                              ("FIRST_AMOUNT", first), ("SECOND_AMOUNT", second)):
+            self.text(COLUMN_X[column], label)
+        self.y += 14
+
+
+def generate_statement(pdf_path, salespeople=8, transactions=(3, 40), swapped=SWAPPED_SALESPEOPLE,
+                       legal_pages=1, month=4, year=25, seed=0):
+    """
+    Writes a synthetic statement to `pdf_path`.
+
+    salespeople: number of "Consumos" sections.
+    transactions: (min, max) transactions per salesperson.
+    swapped: salespeople whose DÓLARES column comes before PESOS.
+    legal_pages: pages after the end markers (never extracted).
+    month, year: statement month; transactions fall in it or the month before.
+
+    Returns a summary: salespeople, transactions and pages.
+    """
+    rng = random.Random(seed)
+    statement_months = MONTHS[max(0, month - 2):month]
+    writer = _StatementWriter()
+
+    writer.new_page(running_header=False)
+    writer.text(36, "Tarjetas de Crédito Resumen", fontsize=12)
+    writer.y = 120
+    writer.text(36, "Resumen de cuenta", fontsize=10)
+
+    writer.new_page()
+    writer.text(36, "DETALLE DEL CONSUMO", fontsize=11)
+    writer.y += 30
+
+    transaction_count = 0
+    for name in salesperson_names(salespeople):
+        is_swapped = name in swapped
+        writer.ensure_space(760)
+        writer.text(36, f"Consumos {name}", fontsize=9)
+        writer.y += 16
+        writer.column_header(is_swapped)
+
+        total_pesos = total_dolares = 0
+        for _ in range(rng.randint(*transactions)):
+            if writer.ensure_space():
+                writer.column_header(is_swapped)
+            pesos = rng.randint(-50000, 9000000)
+            dolares = rng.randint(0, 30000) if rng.random() < 0.2 else 0
+            total_pesos += pesos
+            total_dolares += dolares
+
+            writer.text(COLUMN_X["FECHA"], f"{rng.randint(1, 28):02d}-{rng.choice(statement_months)}-{year:02d}")
+            writer.text(COLUMN_X["DESCRIPCIÓN"], f"MERCHANT {rng.randint(1, 999)} BUENOS AIRES")
+            writer.text(COLUMN_X["NRO. CUPÓN"], str(rng.randint(100000, 999999)))
+            if is_swapped:
+                writer.text(COLUMN_X["FIRST_AMOUNT"], format_amount(dolares))
+                writer.text(COLUMN_X["SECOND_AMOUNT"], format_amount(pesos))
+            else:
+                writer.text(COLUMN_X["FIRST_AMOUNT"], format_amount(pesos))
+                if dolares:
+                    writer.text(COLUMN_X["SECOND_AMOUNT"], format_amount(dolares))
+            writer.y += ROW_HEIGHT
+            transaction_count += 1
+
+        writer.y += 8
+        writer.ensure_space()
+        # La línea de total siempre lleva PESOS primero, como en el resumen real.
+        writer.text(COLUMN_X["DESCRIPCIÓN"], f"TOTAL CONSUMOS DE {name}")
+        writer.text(COLUMN_X["FIRST_AMOUNT"], format_amount(total_pesos))
+        writer.text(COLUMN_X["SECOND_AMOUNT"], format_amount(total_dolares))
+        writer.y += 24
+
+    writer.ensure_space(780)
+    writer.y += 10
+    writer.text(36, "Impuestos, cargos e intereses", fontsize=10)
+    for _ in range(legal_pages):
+        writer.new_page()
+        writer.y = 100
+        writer.text(36, "Legales y avisos", fontsize=10)
+
+    page_count = writer.doc.page_count
+    writer.doc.save(pdf_path)
+    writer.doc.close()
+    return {"salespeople": salespeople, "transactions": transaction_count, "pages": page_count}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un resumen sintético para benchmarks.")
+    parser.add_argument("pdf_path")
+    parser.add_argument("--salespeople", type=int, default=8)
+    parser.add_argument("--min-transactions", type=int, default=3)
+    parser.add_argument("--max-transactions", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate_statement(args.pdf_path, args.salespeople, (args.min_transactions, args.max_transactions),
+                             seed=args.seed))
@@ -0,0 +1,53 @@
+import numpy as np
+
+# --- Ink Detection ---
+# Reducciones vectorizadas sobre el arreglo de píxeles (escala de grises):
+# una captura de 300 DPI tiene millones de píxeles, recorrerlos en Python no
+# es opción. Filas y columnas se reducen al píxel más oscuro sin armar una
+# máscara completa.
+def ink_rows(pixels, threshold):
+    """
+    Boolean array with one value per row of `pixels` (a grayscale array):
+    True if the row has a pixel darker than `threshold`.
+    """
+    return pixels.min(axis=1) < threshold
+
+
+def ink_columns(pixels, threshold):
+    """
+    (left, right) of the columns of `pixels` with ink, right exclusive;
+    None if the array is blank.
+    """
+    columns = np.flatnonzero(pixels.min(axis=0) < threshold)
+    if not columns.size:
+        return None
+    return int(columns[0]), int(columns[-1]) + 1
+
+
+def ink_bands(rows, min_gap):
+    """
+    Runs of rows with ink, as [(top, bottom), ...] with bottom exclusive.
+    Runs separated by fewer than `min_gap` blank rows (accents above
+    capitals, underlines) are merged into one band.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], rows, [False])).astype(np.int8)))
+    bands = []
+    for top, bottom in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        if bands and top - bands[-1][1] < min_gap:
+            bands[-1] = (bands[-1][0], bottom)
+        else:
+            bands.append((top, bottom))
+    return bands
+
+
+def bands_match(band, other, threshold, max_difference):
+    """
+    True if two pixel bands of the same shape carry the same ink, allowing
+    up to `max_difference` of their ink pixels to differ (a page number).
+    """
+    if band.shape != other.shape:
+        return False
+    mask, other_mask = band < threshold, other < threshold
+    if not mask.any() or not other_mask.any():
+        return False
+    return np.count_nonzero(mask ^ other_mask) <= max_difference * np.count_nonzero(mask | other_mask)
@@ -0,0 +1,120 @@
+import json
+import os
+from functools import lru_cache
+
+# --- Configuration Module ---
+class ProfileConfig:
+    """
+    Configuration settings for the declarative column layout profiles.
+    """
+    PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layout_profiles.json")
+
+
+def _header_key(text):
+    return text.replace(' ', '').replace('.', '').upper()
+
+
+class LayoutProfile:
+    """
+    Column layout of one statement format, loaded from layout_profiles.json:
+    expected columns, header aliases, fallback x positions and the
+    salespeople whose currency columns come swapped.
+
+    Column boundaries are learned from a header block the first time its
+    layout is seen and cached by header signature, so the same header on
+    later pages or for other salespeople costs no re-detection.
+    """
+    def __init__(self, name, spec):
+        self.name = name
+        self.columns = list(spec["columns"])
+        self.aliases = {col: [_header_key(alias) for alias in spec.get("aliases", {}).get(col, [col])]
+                        for col in self.columns}
+        self.fallback_x0 = spec.get("fallback_x0", {})
+        self.fixed_x1 = spec.get("fixed_x1", {})
+        self.x_tolerance = spec.get("x_tolerance", 0)
+        self.header_y_tolerance = spec.get("header_y_tolerance", 5)
+        self.fallback_width = spec.get("fallback_width", 100)
+        self.page_right_edge = spec.get("page_right_edge", 1000)
+        self.swapped = spec.get("swapped_columns")
+        self._learned = {}
+
+    def column_order(self, block_text, salesperson):
+        """
+        Column order of a header block. For the salespeople listed under
+        swapped_columns, the two currency columns are swapped when the header
+        shows them in that order.
+        """
+        if not self.swapped:
+            return tuple(self.columns)
+        first, second = self.swapped["first"], self.swapped["second"]
+        salesperson_upper = salesperson.upper()
+        block_text_upper = block_text.upper()
+        if any(name in salesperson_upper for name in self.swapped["salespeople"]) \
+                and first in block_text_upper and block_text_upper.find(first) < block_text_upper.find(second):
+            order = [col for col in self.columns if col not in (first, second)]
+            return tuple(order + [first, second])
+        return tuple(self.columns)
+
+    def resolve_columns(self, block_text, header_block_coords, header_words, salesperson):
+        """
+        Returns {column: (x0, x1)} for a header block, in column order.
+        header_words are the block words sorted by x0.
+        """
+        order = self.column_order(block_text, salesperson)
+        candidate_words = tuple(
+            (w[0], w[4]) for w in header_words if abs(w[1] - header_block_coords[1]) < self.header_y_tolerance
+        )
+        signature = (order, candidate_words)
+        columns = self._learned.get(signature)
+        if columns is None:
+            columns = self._learn_columns(order, candidate_words)
+            self._learned[signature] = columns
+        return dict(columns)
+
+    def _learn_columns(self, order, candidate_words):
+        header_x0s = {}
+        for col_name in order:
+            found_x0 = None
+            for x0, text in candidate_words:
+                if any(alias in _header_key(text) for alias in self.aliases[col_name]):
+                    found_x0 = x0
+                    break
+            if found_x0 is None:
+                found_x0 = self.fallback_x0.get(col_name, 0)
+            # Margen de error en puntos para palabras que empiezan un poco antes del encabezado.
+            header_x0s[col_name] = max(0, found_x0 - self.x_tolerance)
+
+        columns = []
+        for k_idx, col_name in enumerate(order):
+            x0 = header_x0s[col_name]
+            if col_name in self.fixed_x1:
+                x1 = self.fixed_x1[col_name]
+            elif k_idx + 1 < len(order):
+                x1 = header_x0s[order[k_idx + 1]] or x0 + self.fallback_width
+            else:
+                x1 = self.page_right_edge
+            columns.append((col_name, (x0, x1)))
+        return tuple(columns)
+
+
+@lru_cache(maxsize=None)
+def _load_profiles_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def _build_profile(name, path):
+    data = _load_profiles_file(path)
+    if name not in data["profiles"]:
+        raise ValueError(f"Unknown layout profile '{name}' in '{path}'.")
+    return LayoutProfile(name, data["profiles"][name])
+
+
+def get_layout_profile(name=None, path=ProfileConfig.PROFILES_PATH):
+    """
+    Returns the named profile (or the file's default_profile). Profiles are
+    loaded once per process and shared, so learned layouts carry over
+    between documents.
+    """
+    return _build_profile(name or _load_profiles_file(path)["default_profile"], path)
@@ -0,0 +1,131 @@
+import json
+import mmap
+import os
+
+# --- Configuration Module ---
+class StoreConfig:
+    """
+    Configuration settings for the indexed JSONL intermediate file.
+    """
+    INDEX_SUFFIX = ".index.json"
+    FORMAT_VERSION = 1
+    NUMERIC_COLUMNS = ("PESOS", "DÓLARES")
+
+
+def index_path_for(data_path):
+    return os.path.splitext(data_path)[0] + StoreConfig.INDEX_SUFFIX
+
+
+def format_fixed_width_line(values, columns, col_widths):
+    """
+    Renders one row the same way save_to_txt does: numbers right-aligned
+    with thousands separators, everything else left-aligned.
+    """
+    line_parts = []
+    for col_name, value in zip(columns, values):
+        if isinstance(value, (int, float)):
+            line_parts.append(f"{value:,.2f}".rjust(col_widths[col_name]))
+        else:
+            line_parts.append(str(value if value is not None else "").ljust(col_widths[col_name]))
+    return "".join(line_parts).rstrip()
+
+
+def format_report(rows, columns, col_widths):
+    """
+    A vendor's report as it appears in consumos.txt: column header line,
+    transactions and the total line, with the same fixed widths.
+    """
+    lines = [format_fixed_width_line(columns, columns, col_widths)]
+    for row in rows:
+        lines.append(format_fixed_width_line([row.get(col) for col in columns], columns, col_widths))
+    return "\n".join(lines).strip()
+
+
+# --- Writer ---
+def write_consumos_store(vendor_rows, columns, col_widths, latest_date, data_path):
+    """
+    Writes one JSON object per row, grouped by vendor, plus an index with the
+    byte offset and length of each vendor's rows.
+
+    vendor_rows: {vendor: [{"_TYPE": "TRANSACTION" | "TOTAL" | "BLANK", <column>: value, ...}, ...]}
+    Numeric columns keep their float values (None when empty).
+    """
+    os.makedirs(os.path.dirname(data_path) or ".", exist_ok=True)
+    vendors_index = {}
+    offset = 0
+    with open(data_path, "wb") as f:
+        for vendor, rows in vendor_rows.items():
+            chunk = b"".join(
+                json.dumps(
+                    {"vendor": vendor, **{
+                        key: (None if key in StoreConfig.NUMERIC_COLUMNS and value == "" else value)
+                        for key, value in row.items()
+                    }},
+                    ensure_ascii=False,
+                ).encode("utf-8") + b"\n"
+                for row in rows
+            )
+            f.write(chunk)
+            vendors_index[vendor] = {"offset": offset, "length": len(chunk), "rows": len(rows)}
+            offset += len(chunk)
+
+    index = {
+        "version": StoreConfig.FORMAT_VERSION,
+        "latest_date": latest_date.strftime("%Y-%m-%d") if latest_date else None,
+        "statement_month": latest_date.strftime("%Y-%m") if latest_date else None,
+        "columns": list(columns),
+        "txt_col_widths": {col: int(col_widths[col]) for col in columns},
+        "vendors": vendors_index,
+    }
+    with open(index_path_for(data_path), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+
+# --- Reader ---
+class ConsumosStore:
+    """
+    Read access to an indexed JSONL file. The data file is memory-mapped and
+    only the byte range of the requested vendor is decoded.
+    """
+    def __init__(self, data_path):
+        with open(index_path_for(data_path), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != StoreConfig.FORMAT_VERSION:
+            raise ValueError(f"Unsupported consumos store version in '{data_path}'.")
+
+        self.columns = self.index["columns"]
+        self.col_widths = self.index["txt_col_widths"]
+        self.statement_month = self.index.get("statement_month")
+        self._file = open(data_path, "rb")
+        # mmap no acepta archivos vacíos (resumen sin vendedores).
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(data_path) else b""
+
+    def vendors(self):
+        return list(self.index["vendors"])
+
+    def rows(self, vendor):
+        """
+        Typed rows of one vendor, without touching the rest of the file.
+        """
+        entry = self.index["vendors"].get(vendor)
+        if entry is None:
+            return []
+        chunk = self._data[entry["offset"]:entry["offset"] + entry["length"]]
+        return [json.loads(line) for line in chunk.decode("utf-8").splitlines()]
+
+    def report_text(self, vendor):
+        """
+        The vendor's report as it appears in consumos.txt (see format_report).
+        """
+        return format_report(self.rows(vendor), self.columns, self.col_widths)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+
+# --- Configuration Module ---
+class LedgerConfig:
+    """
+    Configuration settings for the persistent Slack delivery ledger.
+    """
+    DB_PATH = "output_txt/envios.sqlite3"
+    NO_MONTH = "sin-mes"
+
+
+def content_hash(content):
+    """
+    SHA-256 of the exact message (or file bytes) sent, so a corrected report
+    is sent again while an unchanged one is not.
+    """
+    return hashlib.sha256(content.encode("utf-8") if isinstance(content, str) else content).hexdigest()
+
+
+class DeliveryLedger:
+    """
+    SQLite ledger (WAL mode) of every report delivered to Slack, keyed by
+    vendor, statement month and content hash. Each send is committed on its
+    own, so a run that dies halfway can be resumed without double-sending.
+    The primary key doubles as the lookup index, keeping checks cheap as
+    history grows.
+    """
+    def __init__(self, db_path=LedgerConfig.DB_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deliveries (
+                vendor TEXT NOT NULL,
+                statement_month TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                slack_ts TEXT,
+                sent_at TEXT NOT NULL,
+                PRIMARY KEY (vendor, statement_month, content_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self.connection.commit()
+
+    def already_delivered(self, vendor, statement_month, digest):
+        row = self.connection.execute(
+            "SELECT 1 FROM deliveries WHERE vendor = ? AND statement_month = ? AND content_hash = ?",
+            (vendor, statement_month or LedgerConfig.NO_MONTH, digest),
+        ).fetchone()
+        return row is not None
+
+    def record(self, vendor, statement_month, digest, channel, slack_ts):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO deliveries VALUES (?, ?, ?, ?, ?, ?)",
+                (vendor, statement_month or LedgerConfig.NO_MONTH, digest, channel, slack_ts,
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
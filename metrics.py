@@ -0,0 +1,193 @@
+import functools
+import json
+import os
+import time
+
+# --- Configuration Module ---
+class MetricsConfig:
+    """
+    Configuration settings for stage timing and counters.
+    Set EXTRACTOS_METRICS to a file path to enable them: a .prom/.txt path
+    is written as OpenMetrics text, anything else as JSON.
+    """
+    OUTPUT_PATH = os.getenv("EXTRACTOS_METRICS")
+    PREFIX = "extractos"
+    QUANTILES = (0.5, 0.9, 0.99)
+    # Tasas derivadas: contador / tiempo total del span indicado.
+    RATES = {
+        "pages_per_second": ("pages_extracted", "layout.page_text"),
+        "rows_per_second": ("rows_parsed", "extract.stitch"),
+    }
+
+
+_enabled = bool(MetricsConfig.OUTPUT_PATH)
+_spans = {}     # nombre -> [duraciones en segundos]
+_counters = {}  # nombre -> valor acumulado
+
+
+class _NullSpan:
+    """
+    Shared no-op span returned while metrics are disabled: no allocation,
+    no clock read.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _spans.setdefault(self.name, []).append(time.perf_counter() - self.started)
+        return False
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    _spans.clear()
+    _counters.clear()
+
+
+def span(name):
+    """
+    Times a stage: `with metrics.span("excel.write"): ...`.
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name):
+    """
+    Decorator form of span(). While metrics are disabled the only cost is
+    one flag check per call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _spans.setdefault(name, []).append(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def observe(name, seconds):
+    """
+    Records a duration measured elsewhere (for example, one API call).
+    """
+    if _enabled:
+        _spans.setdefault(name, []).append(seconds)
+
+
+def count(name, value=1):
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def _quantile(sorted_values, q):
+    # Método del rango más cercano; suficiente para latencias de etapas.
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def snapshot():
+    """
+    Current spans (count, total, min, max and quantiles, in seconds),
+    counters and derived rates, as a JSON-serializable dict.
+    """
+    spans = {}
+    for name, durations in sorted(_spans.items()):
+        values = sorted(durations)
+        spans[name] = {
+            "count": len(values),
+            "total": sum(values),
+            "min": values[0],
+            "max": values[-1],
+            **{f"p{int(q * 100)}": _quantile(values, q) for q in MetricsConfig.QUANTILES},
+        }
+    rates = {}
+    for rate_name, (counter_name, span_name) in MetricsConfig.RATES.items():
+        if counter_name in _counters and spans.get(span_name, {}).get("total"):
+            rates[rate_name] = _counters[counter_name] / spans[span_name]["total"]
+    return {"spans": spans, "counters": dict(sorted(_counters.items())), "rates": rates}
+
+
+def _metric_name(name):
+    return f"{MetricsConfig.PREFIX}_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def to_openmetrics(data=None):
+    """
+    Renders a snapshot in the OpenMetrics text format: one summary family
+    for every span, one counter per counter and one gauge per rate.
+    """
+    data = data or snapshot()
+    lines = []
+    if data["spans"]:
+        family = f"{MetricsConfig.PREFIX}_span_seconds"
+        lines.append(f"# TYPE {family} summary")
+        lines.append(f"# UNIT {family} seconds")
+        for name, stats in data["spans"].items():
+            for q in MetricsConfig.QUANTILES:
+                lines.append(f'{family}{{span="{name}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.9f}')
+            lines.append(f'{family}_sum{{span="{name}"}} {stats["total"]:.9f}')
+            lines.append(f'{family}_count{{span="{name}"}} {stats["count"]}')
+    for name, value in data["counters"].items():
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}_total {value}")
+    for name, value in data["rates"].items():
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value:.6f}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path=None):
+    """
+    Writes the collected metrics to `path` (MetricsConfig.OUTPUT_PATH by
+    default). Does nothing while metrics are disabled.
+    """
+    path = path or MetricsConfig.OUTPUT_PATH
+    if not (_enabled and path):
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith((".prom", ".txt")):
+            f.write(to_openmetrics())
+        else:
+            json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+    print(f"Metrics saved to {path}")
+    return path
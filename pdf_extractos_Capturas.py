@@ -1,7 +1,18 @@
 import fitz  # PyMuPDF
 from PIL import Image
+import argparse
+import asyncio
+import io
+import json
 import re
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+import metrics
+import numpy as np
+from capture_trim import bands_match, ink_bands, ink_columns, ink_rows
+from pdf_layout import LayoutConfig, load_layout, group_words_into_lines
 
 # --- Configuration Module ---
 class Config:
@@ -14,54 +25,75 @@ class Config:
     PERSON_HEADER_PATTERN = re.compile(r"Consumos\s+(.*?)(?:\s{2,}|FECHA|DESCRIPCIÓN|NRO\. CUPÓN|Banco|$)")
 
     TOTAL_CONSUMOS_PATTERN = "TOTAL CONSUMOS DE"
-    START_MARKER = "DETALLE"
+    START_MARKER = LayoutConfig.START_MARKER
     END_MARKER_1 = "Impuestos, cargos e intereses"
     END_MARKER_2 = "Legales y avisos"
     DEFAULT_FILENAME_PLACEHOLDER = "Persona XXX"
     DPI = 300 # Higher DPI for better image quality
+    RENDER_CACHE_SIZE = 2 # Rendered page regions kept in memory (LRU); planned pages leave it after their last use
+    MAX_CAPTURE_HEIGHT = 12000 # Pixels; taller sections are rendered at a lower DPI
+    # Render profiles: the pixmap colorspace used when rasterizing, the
+    # output format and how the DPI is chosen. "rgb" is the historical output.
+    RENDER_PROFILE = "rgb"
+    RENDER_PROFILES = {
+        "rgb": {"colorspace": "RGB", "format": "JPEG", "extension": ".jpg"},
+        "gray": {"colorspace": "GRAY", "format": "JPEG", "extension": ".jpg"},
+        "bilevel-png": {"colorspace": "GRAY", "bilevel": True, "format": "PNG", "extension": ".png"},
+        "bilevel-tiff": {"colorspace": "GRAY", "bilevel": True, "format": "TIFF", "extension": ".tif",
+                         "save": {"compression": "group4"}},
+        "rgb-adaptive": {"colorspace": "RGB", "format": "JPEG", "extension": ".jpg", "adaptive_dpi": True},
+    }
+    BILEVEL_THRESHOLD = 160 # Gray levels below this become black in the 1-bit profiles
+    ADAPTIVE_LINE_HEIGHT_PX = 28 # Adaptive DPI: target height in pixels of a typical text line
+    ADAPTIVE_MIN_DPI = 120
+    SECTIONS_MANIFEST = "secciones.json" # Incremental mode: sections and page hashes of the last run
+    # Trimming: blank margins are cut, page breaks inside a section are
+    # closed up and the bank's running header/footer is dropped from them.
+    TRIM_CAPTURES = True
+    INK_THRESHOLD = 200 # Gray levels below this count as ink
+    TRIM_PADDING_PT = 6 # White border left around the ink, in points
+    BAND_MIN_GAP_PT = 1.5 # Ink rows closer than this belong to the same text line
+    HEADER_ZONE_PT = 50 # Running headers must end within this distance of the page top
+    FOOTER_ZONE_PT = 40 # Running footers must start within this distance of the page bottom
+    BAND_MAX_DIFFERENCE = 0.15 # Share of a band's ink that may change between pages (page number)
 
 # --- PDF Processing Module ---
 class PDFProcessor:
     """
     Handles reading and processing the PDF to identify relevant sections.
     """
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, document=None, layout=None, incremental=False):
         self.pdf_path = pdf_path
-        self.document = fitz.open(pdf_path)
+        # El pipeline de un solo proceso pasa el documento ya abierto; en ese caso no se cierra acá.
+        self._owns_document = document is None
+        if document is None:
+            with metrics.span("pdf.open"):
+                document = fitz.open(pdf_path)
+        self.document = document
+        # Palabras y bloques compartidos con el extractor de Excel/TXT vía la caché de layout.
+        self.layout = layout if layout is not None else load_layout(pdf_path, document=document, incremental=incremental)
         self.relevant_page_range = self._get_relevant_page_range()
 
     def _get_relevant_page_range(self):
         """
-        Identifies the start page for processing. The end is handled
-        dynamically within find_person_sections based on end markers.
+        The [start, stop) page range planned by pdf_layout: from the first
+        DETALLE page up to the legal notices. Within it, find_person_sections
+        still stops at the first end marker.
         """
-        start_idx = -1
-        # Find start page
-        for i in range(self.document.page_count):
-            page = self.document.load_page(i)
-            if Config.START_MARKER in page.get_text():
-                start_idx = i
-                break
-
-        if start_idx == -1:
+        if self.layout.start is None:
             raise ValueError(f"'{Config.START_MARKER}' marker not found in the PDF. Cannot determine start page.")
+        return self.layout.start, self.layout.stop
 
-        # Set end_idx to the full document count.
-        # Dynamic termination will happen in find_person_sections.
-        end_idx = self.document.page_count 
-
-        return start_idx, end_idx
-
+    @metrics.timed("capture.find_sections")
     def find_person_sections(self):
         sections = []
         current_section = None
-        start_page_idx, _ = self.relevant_page_range # end_page_idx is ignored, loop goes to end
+        start_page_idx, end_page_idx = self.relevant_page_range
         
         stop_processing_consumption = False # NEW FLAG
 
-        for i in range(start_page_idx, self.document.page_count): # Loop to the very end of the document
-            page = self.document.load_page(i)
-            words = page.get_text("words")
+        for i in range(start_page_idx, end_page_idx): # Pages past the legal notices are never loaded
+            words = self.layout[i].words
             lines_with_bboxes = self._get_lines_with_bboxes(words)
 
             for line_text, line_bbox in lines_with_bboxes:
@@ -171,64 +203,69 @@ class PDFProcessor:
     def _get_lines_with_bboxes(self, words):
         """
         Groups words into lines and associates a bounding box with each line.
+        Lines are built per block with the same y grouping used by the Excel/TXT
+        extractor, so a table row is one line even when PyMuPDF splits its cells.
         """
-        lines = {}
+        words_by_block = {}
         for w in words:
             # w = (x0, y0, x1, y1, "word", block_no, line_no, word_no)
-            key = (w[5], w[6]) # block_no, line_no
-            if key not in lines:
-                lines[key] = {'text': [], 'bbox': fitz.Rect(w[0], w[1], w[2], w[3])}
-            lines[key]['text'].append(w[4])
-            lines[key]['bbox'].include_rect(fitz.Rect(w[0], w[1], w[2], w[3]))
+            words_by_block.setdefault(w[5], []).append(w)
 
-        sorted_lines = sorted(lines.items(), key=lambda x: (x[0][0], x[0][1]))
-        return [(" ".join(item[1]['text']), item[1]['bbox']) for item in sorted_lines]
+        lines_with_bboxes = []
+        for block_no in sorted(words_by_block):
+            for line_words in group_words_into_lines(words_by_block[block_no]):
+                bbox = fitz.Rect(line_words[0][:4])
+                for w in line_words[1:]:
+                    bbox.include_rect(w[:4])
+                lines_with_bboxes.append((" ".join(w[4] for w in line_words), bbox))
+        return lines_with_bboxes
 
     def close(self):
-        self.document.close()
+        if self._owns_document:
+            self.document.close()
 
 # --- Image Generation Module ---
 class ImageGenerator:
     """
     Responsible for rendering PDF sections into cropped images.
+    Pages are rendered only over the region the sections need (clip rendering)
+    and kept in a small LRU cache, so a page shared by several salespeople
+    is rasterized once per run.
     """
-    def __init__(self, document):
+    def __init__(self, document, output_dir=Config.OUTPUT_DIR, profile=None, dpi=None):
         self.document = document
-        os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
+        self.output_dir = output_dir
+        # Sin output_dir (subida directa a Slack) no se escribe nada en disco.
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
         self.name_counts = {} # New: To track occurrences of names
-
-    def generate_image(self, section_data):
+        self.profile_name = profile or Config.RENDER_PROFILE
+        self.profile = Config.RENDER_PROFILES[self.profile_name]
+        # El perfil se aplica al rasterizar (colorspace del pixmap), no convirtiendo después.
+        self.colorspace = fitz.csGRAY if self.profile["colorspace"] == "GRAY" else fitz.csRGB
+        self.image_mode = "L" if self.profile["colorspace"] == "GRAY" else "RGB"
+        self.dpi = dpi or Config.DPI
+        self.scale_factor = self.dpi / 72
+        self.planned_regions = {} # page_idx -> union of the pixel boxes that will be requested
+        self.pending_segments = {} # page_idx -> planned segments of the page not rendered yet
+        self._render_cache = OrderedDict() # page_idx -> (pixel_box, Image), LRU order
+
+    def _section_segments(self, section_data, scale_factor=None):
         """
-        Generates and saves a cropped image for a given person's section.
+        Returns the pixel boxes, in full-page raster coordinates, that a section
+        needs from each page: [(page_idx, (left, top, right, bottom)), ...].
+        Every segment of a multi-page section is already cropped to the
+        content width, so segments can be stacked without further cropping.
         """
-        person_name = section_data['name']
         start_page_idx = section_data['start_page']
         end_page_idx = section_data['end_page']
         start_bbox = section_data['start_bbox']
         end_bbox = section_data['end_bbox']
         details_bboxes = section_data['details_bboxes']
-
-        # Determine base filename
-        base_filename = f"Consumos {person_name}" if person_name else Config.DEFAULT_FILENAME_PLACEHOLDER
-
-        # Handle duplicate names for unique file paths
-        if base_filename in self.name_counts:
-            self.name_counts[base_filename] += 1
-            filename = f"{base_filename} ({self.name_counts[base_filename]}).jpg"
-        else:
-            self.name_counts[base_filename] = 1
-            filename = f"{base_filename}.jpg"
-
-        output_path = os.path.join(Config.OUTPUT_DIR, filename)
+        scale_factor = scale_factor or self.scale_factor
 
         if start_page_idx == end_page_idx:
-            # Single page section
-            page = self.document.load_page(start_page_idx)
-            pix = page.get_pixmap(matrix=fitz.Matrix(Config.DPI/72, Config.DPI/72))
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
             # Calculate the overall bounding box for cropping on a single page
-            # Ahora que la agrupación de secciones es correcta, esta lógica funcionará bien.
             overall_top = start_bbox.y0
             overall_bottom = end_bbox.y1
             overall_left = min(start_bbox.x0, end_bbox.x0)
@@ -240,116 +277,584 @@ class ImageGenerator:
                     overall_bottom = max(overall_bottom, d_bbox.y1)
                     overall_left = min(overall_left, d_bbox.x0)
                     overall_right = max(overall_right, d_bbox.x1)
-            
+
             # Convert PDF coordinates to image pixel coordinates
-            scale_factor = Config.DPI / 72
             crop_box = (
                 int(overall_left * scale_factor)-30,
                 int(overall_top * scale_factor)-30,
                 int(overall_right * scale_factor)+30,
                 int(overall_bottom * scale_factor)+30
             )
-            img_cropped = img.crop(crop_box)
-            img_cropped.save(output_path, dpi=(Config.DPI, Config.DPI))
-            print(f"Generated: {output_path}")
+            return [(start_page_idx, crop_box)]
+
+        # The final image is exactly the width of the content, so every page
+        # segment is clipped horizontally to it before stitching.
+        overall_left = min(start_bbox.x0, end_bbox.x0)
+        overall_right = max(start_bbox.x1, end_bbox.x1)
+        for p_idx, d_bbox in details_bboxes:
+            overall_left = min(overall_left, d_bbox.x0)
+            overall_right = max(overall_right, d_bbox.x1)
+        content_left = int(overall_left * scale_factor) - 30
+        content_right = int(overall_right * scale_factor) + 30
+
+        segments = []
+        # First page segment: from start_bbox.y0 to bottom of page
+        page_rect = self.document.load_page(start_page_idx).rect
+        segments.append((start_page_idx, (
+            content_left,
+            int(start_bbox.y0 * scale_factor),
+            content_right,
+            int(page_rect.y1 * scale_factor)
+        )))
+
+        # Intermediate pages
+        for p_idx in range(start_page_idx + 1, end_page_idx):
+            page_rect = self.document.load_page(p_idx).rect
+            segments.append((p_idx, (
+                content_left,
+                int(page_rect.y0 * scale_factor),
+                content_right,
+                int(page_rect.y1 * scale_factor)
+            )))
+
+        # Last page segment: from top of page to end_bbox.y1
+        page_rect = self.document.load_page(end_page_idx).rect
+        segments.append((end_page_idx, (
+            content_left,
+            int(page_rect.y0 * scale_factor),
+            content_right,
+            int(end_bbox.y1 * scale_factor)
+        )))
+        return segments
+
+    def plan_sections(self, sections):
+        """
+        Records, for every page, the union of the regions all sections will
+        request and how many segments need it. The first request for a page
+        then renders that union once instead of one region per section, and
+        the region is released as soon as its last segment is cropped.
+        """
+        for section in sections:
+            for page_idx, box in self._section_segments(section):
+                self.pending_segments[page_idx] = self.pending_segments.get(page_idx, 0) + 1
+                if page_idx in self.planned_regions:
+                    planned = self.planned_regions[page_idx]
+                    box = (min(planned[0], box[0]), min(planned[1], box[1]),
+                           max(planned[2], box[2]), max(planned[3], box[3]))
+                self.planned_regions[page_idx] = box
+
+    def _render_region(self, page_idx, box):
+        """
+        Returns the pixels of `box` (full-page raster coordinates) as an RGB
+        image, identical to rendering the whole page and cropping it.
+        Only the needed region of the page is rasterized.
+        """
+        cached = self._render_cache.get(page_idx)
+        if cached is None or not _box_contains(cached[0], box):
+            region = self.planned_regions.get(page_idx, box)
+            if not _box_contains(region, box):
+                region = box
+            cached = self._render_clip(page_idx, region, self.scale_factor)
+
+            self._render_cache[page_idx] = cached
+            while len(self._render_cache) > Config.RENDER_CACHE_SIZE:
+                self._render_cache.popitem(last=False)
+        self._render_cache.move_to_end(page_idx)
+
+        # Las secciones se recorren en orden de página: ningún segmento
+        # posterior vuelve a pedir una página planificada ya agotada.
+        pending = self.pending_segments.get(page_idx)
+        if pending is not None:
+            if pending <= 1:
+                del self.pending_segments[page_idx]
+                del self._render_cache[page_idx]
+            else:
+                self.pending_segments[page_idx] = pending - 1
+        return _crop_rendered(cached, box)
+
+    @metrics.timed("capture.render")
+    def _render_clip(self, page_idx, box, scale_factor):
+        """
+        Rasterizes `box` (raster coordinates at `scale_factor`) without caching,
+        in the colorspace of the render profile.
+        Returns (rendered_box, Image); rendered_box is `box` limited to the page.
+        """
+        page = self.document.load_page(page_idx)
+        clip = fitz.Rect(box) / scale_factor
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale_factor, scale_factor), clip=clip & page.rect,
+                              colorspace=self.colorspace)
+        metrics.count("capture_pixels_rendered", pix.width * pix.height)
+        metrics.count("capture_raster_bytes", pix.width * pix.height * pix.n)
+        img = Image.frombytes(self.image_mode, [pix.width, pix.height], pix.samples_mv)
+        return (pix.x, pix.y, pix.x + pix.width, pix.y + pix.height), img
+
+    def next_filename(self, person_name):
+        """
+        Returns the image filename for the next section of `person_name`,
+        numbering repeated names in the order they are requested.
+        """
+        # Determine base filename
+        base_filename = f"Consumos {person_name}" if person_name else Config.DEFAULT_FILENAME_PLACEHOLDER
+
+        # Handle duplicate names for unique file paths
+        extension = self.profile["extension"]
+        if base_filename in self.name_counts:
+            self.name_counts[base_filename] += 1
+            return f"{base_filename} ({self.name_counts[base_filename]}){extension}"
+        self.name_counts[base_filename] = 1
+        return f"{base_filename}{extension}"
+
+    def render_image(self, section_data):
+        """
+        Renders a person's section into a single image.
+        Returns (image, dpi, stitched); stitched is True for multi-page sections.
+        """
+        segments = self._section_segments(section_data)
+        dpi = self.dpi
+        scale_factor = self.scale_factor
+        render = self._render_region
+
+        # Tall sections: instead of an unbounded canvas, the whole section is
+        # rendered at a lower DPI so its height fits Config.MAX_CAPTURE_HEIGHT.
+        total_height = sum(box[3] - box[1] for _, box in segments)
+        if total_height > Config.MAX_CAPTURE_HEIGHT:
+            scale_factor = self.scale_factor * Config.MAX_CAPTURE_HEIGHT / total_height
+            dpi = int(scale_factor * 72)
+            segments = self._section_segments(section_data, scale_factor)
+            render = lambda page_idx, box: _crop_rendered(self._render_clip(page_idx, box, scale_factor), box)
+            total_height = sum(box[3] - box[1] for _, box in segments)
+            print(f"WARNING: Section for '{section_data['name']}' is too tall; rendering it at {dpi} DPI.")
+
+        if Config.TRIM_CAPTURES:
+            trimmed = self._trim_section(segments, render, scale_factor)
+            if trimmed is not None:
+                return self._finish_image(trimmed), dpi, len(segments) > 1
+
+        if len(segments) == 1:
+            # Single page section
+            page_idx, crop_box = segments[0]
+            return self._finish_image(render(page_idx, crop_box)), dpi, False
+
+        # Multi-page section: every segment already has the content width,
+        # so it is pasted straight into a canvas of the final size.
+        width = segments[0][1][2] - segments[0][1][0]
+        stitched_image = Image.new(self.image_mode, (width, total_height))
+        y_offset = 0
+        for page_idx, box in segments:
+            stitched_image.paste(render(page_idx, box), (0, y_offset))
+            y_offset += box[3] - box[1]
+        return self._finish_image(stitched_image), dpi, True
+
+    @metrics.timed("capture.trim")
+    def _trim_section(self, segments, render, scale_factor):
+        """
+        Builds the section image from its segments [(page_idx, box), ...]
+        keeping only the rows with ink: blank margins are cut, the bank's
+        running header/footer at each page break is dropped, and the pages
+        are joined with the section's own line spacing. Each segment is
+        rendered with `render` and cut down to its ink right away, so only
+        one full segment is alive at a time; the canvas is allocated once,
+        at its final size, when all the strips are known.
+        Returns None if the section has no ink (it is then stitched as is).
+        """
+        min_gap = max(1, round(Config.BAND_MIN_GAP_PT * scale_factor))
+        padding = round(Config.TRIM_PADDING_PT * scale_factor)
+        pages = (segments[0][0], segments[-1][0])
+        strips = []
+        gaps = []
+        for idx, (page_idx, box) in enumerate(segments):
+            image = render(page_idx, box)
+            pixels = _gray_pixels(image)
+            bands = ink_bands(ink_rows(pixels, Config.INK_THRESHOLD), min_gap)
+            # Continuation pages start at the page top and every page but the
+            # last ends at the page bottom: that is where running headers and
+            # footers are, so only there a band repeated on another page of
+            # the section is dropped.
+            if idx > 0:
+                zone = Config.HEADER_ZONE_PT * scale_factor
+                while bands and bands[0][1] <= zone and self._repeats_nearby(page_idx, pages, box, bands[0], pixels, scale_factor):
+                    bands.pop(0)
+            if idx < len(segments) - 1:
+                zone = (box[3] - box[1]) - Config.FOOTER_ZONE_PT * scale_factor
+                while bands and bands[-1][0] >= zone and self._repeats_nearby(page_idx, pages, box, bands[-1], pixels, scale_factor):
+                    bands.pop()
+            if not bands:
+                continue
+
+            top, bottom = bands[0][0], bands[-1][1]
+            columns = ink_columns(pixels[top:bottom], Config.INK_THRESHOLD)
+            if len(segments) == 1:
+                # Una sola página: el borde ya viene renderizado (y sin tinta), alcanza con un recorte.
+                crop_box = (columns[0] - padding, top - padding, columns[1] + padding, bottom + padding)
+                if crop_box[0] >= 0 and crop_box[1] >= 0 and crop_box[2] <= image.width and crop_box[3] <= image.height:
+                    return image.crop(crop_box)
+
+            gaps.extend(bands[i + 1][0] - bands[i][1] for i in range(len(bands) - 1))
+            strips.append((image.crop((columns[0], top, columns[1], bottom)), columns[0]))
+        if not strips:
+            return None
+
+        # Mismo ancho para todas las páginas: la unión de las columnas con tinta.
+        left = min(x for _, x in strips)
+        right = max(x + strip.width for strip, x in strips)
+        gaps.sort()
+        page_gap = gaps[len(gaps) // 2] if gaps else padding
+        height = sum(strip.height for strip, _ in strips) + page_gap * (len(strips) - 1)
+        canvas = Image.new(self.image_mode, (right - left + 2 * padding, height + 2 * padding), "white")
+        y_offset = padding
+        for strip, x in strips:
+            canvas.paste(strip, (x - left + padding, y_offset))
+            y_offset += strip.height + page_gap
+        return canvas
+
+    def _repeats_nearby(self, page_idx, pages, box, band, pixels, scale_factor):
+        """
+        True if the rows `band` of a segment of page `page_idx` (`box`,
+        rendered as `pixels`) carry the same ink at the same place on the
+        previous or the next page. Both are tried because the first page
+        of the detail usually has its own header, but only pages of the
+        section (`pages`, first and last) count: the incremental render
+        key covers no others.
+        """
+        band_box = (box[0], box[1] + band[0], box[2], box[1] + band[1])
+        for other_idx in (page_idx - 1, page_idx + 1):
+            if not pages[0] <= other_idx <= pages[1]:
+                continue
+            other = _crop_rendered(self._render_clip(other_idx, band_box, scale_factor), band_box)
+            if bands_match(pixels[band[0]:band[1]], _gray_pixels(other), Config.INK_THRESHOLD,
+                           Config.BAND_MAX_DIFFERENCE):
+                return True
+        return False
+
+    def _finish_image(self, image):
+        # 1 bit por píxel: PyMuPDF no rasteriza en bilevel, se umbraliza el gris renderizado.
+        if self.profile.get("bilevel"):
+            return image.point(_BILEVEL_TABLE, "1")
+        return image
+
+    def _save(self, image, target, dpi):
+        with metrics.span("capture.encode"):
+            image.save(target, format=self.profile["format"], dpi=(dpi, dpi), **self.profile.get("save", {}))
+
+    def generate_image(self, section_data, filename=None):
+        """
+        Generates and saves a cropped image for a given person's section.
+        Returns the path of the saved image. `filename` is given when the
+        names were assigned up front (parallel rendering).
+        """
+        if filename is None:
+            filename = self.next_filename(section_data['name'])
+
+        output_path = os.path.join(self.output_dir, filename)
+        image, dpi, stitched = self.render_image(section_data)
+        self._save(image, output_path, dpi)
+        metrics.count("captures_written")
+        metrics.count("capture_bytes_written", os.path.getsize(output_path))
+        print(f"Generated (stitched): {output_path}" if stitched else f"Generated: {output_path}")
+        return output_path
+
+    def encode_image(self, section_data):
+        """
+        Renders a section and returns the encoded image, the same bytes
+        generate_image would write, without touching the disk.
+        """
+        image, dpi, _ = self.render_image(section_data)
+        buffer = io.BytesIO()
+        self._save(image, buffer, dpi)
+        metrics.count("captures_encoded")
+        metrics.count("capture_bytes_encoded", buffer.tell())
+        return buffer.getvalue()
+
+
+def _gray_pixels(image):
+    # En RGB la tinta se busca en el canal verde: el texto del resumen es oscuro
+    # en los tres canales, y extraer uno cuesta la mitad que convertir a gris.
+    return np.asarray(image if image.mode == "L" else image.getchannel("G"))
+
+
+_BILEVEL_TABLE = [0 if level < Config.BILEVEL_THRESHOLD else 255 for level in range(256)]
+
+
+def render_dpi(sections, profile=None):
+    """
+    DPI for all the sections of a run. Fixed profiles use Config.DPI;
+    adaptive ones pick the DPI at which the median text line of the
+    sections is ADAPTIVE_LINE_HEIGHT_PX tall, never above Config.DPI.
+    Decided once for the whole run, so every worker renders at the same DPI.
+    """
+    if not Config.RENDER_PROFILES[profile or Config.RENDER_PROFILE].get("adaptive_dpi"):
+        return Config.DPI
+    heights = sorted(
+        bbox.height
+        for section in sections
+        for bbox in [section['start_bbox'], section['end_bbox']] + [b for _, b in section['details_bboxes']]
+        if bbox.height > 0
+    )
+    if not heights:
+        return Config.DPI
+    dpi = round(Config.ADAPTIVE_LINE_HEIGHT_PX * 72 / heights[len(heights) // 2])
+    return max(Config.ADAPTIVE_MIN_DPI, min(Config.DPI, dpi))
+
+
+def _box_contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def _crop_rendered(rendered, box):
+    """
+    Crops `box` out of a (rendered_box, Image) pair. Outside the page Pillow
+    fills with black, the same as cropping a full-page render.
+    """
+    (origin_x, origin_y, _, _), img = rendered
+    return img.crop((box[0] - origin_x, box[1] - origin_y, box[2] - origin_x, box[3] - origin_y))
+
 
+# --- Parallel Rendering ---
+# Cada proceso abre el documento una sola vez (initializer) y renderiza las
+# secciones que se le asignan; los nombres de archivo ya vienen decididos.
+_worker_image_gen = None
+
+def _init_render_worker(pdf_file_path, output_dir, profile, dpi):
+    global _worker_image_gen
+    _worker_image_gen = ImageGenerator(fitz.open(pdf_file_path), output_dir, profile, dpi)
+
+
+def _render_sections(tasks):
+    """
+    Worker task: renders a contiguous run of (section, filename) pairs and
+    returns [(filename, output_path, seconds), ...].
+    """
+    _worker_image_gen.plan_sections([section for section, _ in tasks])
+    return _render_tasks(_worker_image_gen, tasks)
+
+
+def _render_tasks(image_gen, tasks):
+    results = []
+    for section, filename in tasks:
+        started = time.perf_counter()
+        output_path = image_gen.generate_image(section, filename)
+        results.append((filename, output_path, time.perf_counter() - started))
+    return results
+
+
+def render_sections(pdf_file_path, document, sections, output_dir=Config.OUTPUT_DIR, workers=1, profile=None):
+    """
+    Renders every section and returns [(filename, output_path, seconds), ...]
+    in section order. Filenames (including the numbering of repeated names)
+    are decided before any work is distributed, so they do not depend on
+    which worker finishes first. Sections are split into contiguous runs to
+    keep pages shared by neighbouring sections in the same worker's cache.
+    `profile` is one of Config.RENDER_PROFILES (Config.RENDER_PROFILE if None).
+    """
+    image_gen = ImageGenerator(document, output_dir, profile, render_dpi(sections, profile))
+    filenames = [image_gen.next_filename(section['name']) for section in sections]
+    return _run_render_tasks(pdf_file_path, image_gen, list(zip(sections, filenames)), output_dir, workers)
+
+
+def _run_render_tasks(pdf_file_path, image_gen, tasks, output_dir, workers):
+    """
+    Renders (section, filename) pairs with `image_gen`, or in a process pool
+    when workers > 1. Results keep the order of `tasks`.
+    """
+    if workers <= 1:
+        image_gen.plan_sections([section for section, _ in tasks])
+        return _render_tasks(image_gen, tasks)
+
+    chunk_size = -(-len(tasks) // workers)
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                             initargs=(pdf_file_path, output_dir, image_gen.profile_name, image_gen.dpi)) as executor:
+        for chunk_results in executor.map(_render_sections, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+# --- Incremental Rendering ---
+def _section_record(section, filename, layout, image_gen):
+    """
+    JSON form of a section for the manifest: its page span, the bounding
+    boxes found by find_person_sections and the hashes of the pages it covers.
+    """
+    return {
+        'name': section['name'],
+        'filename': filename,
+        'start_page': section['start_page'],
+        'end_page': section['end_page'],
+        'start_bbox': list(section['start_bbox']),
+        'end_bbox': list(section['end_bbox']),
+        'details_bboxes': [[page_idx, list(bbox)] for page_idx, bbox in section['details_bboxes']],
+        'page_hashes': [layout[i].content_hash for i in range(section['start_page'], section['end_page'] + 1)],
+        'render': [image_gen.profile_name, image_gen.dpi, Config.MAX_CAPTURE_HEIGHT, _trim_settings()],
+    }
+
+
+def _trim_settings():
+    # Todo lo que cambia el recorte; False si no se recorta.
+    if not Config.TRIM_CAPTURES:
+        return False
+    return [Config.INK_THRESHOLD, Config.TRIM_PADDING_PT, Config.BAND_MIN_GAP_PT,
+            Config.HEADER_ZONE_PT, Config.FOOTER_ZONE_PT, Config.BAND_MAX_DIFFERENCE]
+
+
+def _render_key(record):
+    """
+    What the image of a section depends on: the content of its pages, its
+    boxes and the render settings, but not where the pages sit in the PDF.
+    """
+    start = record['start_page']
+    return (
+        record['page_hashes'],
+        record['start_bbox'],
+        record['end_bbox'],
+        [[page_idx - start, bbox] for page_idx, bbox in record['details_bboxes']],
+        record['render'],
+    )
+
+
+def read_sections_manifest(output_dir):
+    """
+    Returns the section records of the last incremental run in `output_dir`,
+    keyed by filename ({} if there is none).
+    """
+    try:
+        with open(os.path.join(output_dir, Config.SECTIONS_MANIFEST), encoding="utf-8") as f:
+            return {record['filename']: record for record in json.load(f)['sections']}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_sections_manifest(output_dir, pdf_hash, records):
+    path = os.path.join(output_dir, Config.SECTIONS_MANIFEST)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({'pdf_hash': pdf_hash, 'sections': records}, f, ensure_ascii=False, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+
+def render_sections_incremental(pdf_file_path, document, layout, sections, output_dir=Config.OUTPUT_DIR, workers=1,
+                                profile=None):
+    """
+    Like render_sections, but only the sections whose pages or boxes changed
+    since the last incremental run in `output_dir` are rendered again; the
+    others keep their existing image (reported with seconds=None). Images
+    of sections that no longer exist are removed.
+    """
+    previous = read_sections_manifest(output_dir)
+    image_gen = ImageGenerator(document, output_dir, profile, render_dpi(sections, profile))
+    filenames = [image_gen.next_filename(section['name']) for section in sections]
+    records = [_section_record(section, filename, layout, image_gen) for section, filename in zip(sections, filenames)]
+
+    to_render = []
+    for section, filename, record in zip(sections, filenames, records):
+        old = previous.get(filename)
+        if old is None or None in record['page_hashes'] or _render_key(old) != _render_key(record) \
+                or not os.path.exists(os.path.join(output_dir, filename)):
+            to_render.append((section, filename))
+
+    rendered = {}
+    if to_render:
+        results = _run_render_tasks(pdf_file_path, image_gen, to_render, output_dir, workers)
+        rendered = {filename: (output_path, seconds) for filename, output_path, seconds in results}
+    metrics.count("captures_reused", len(sections) - len(to_render))
+
+    for filename in set(previous) - set(filenames):
+        stale_path = os.path.join(output_dir, filename)
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+            print(f"Removed (section no longer in the PDF): {stale_path}")
+
+    write_sections_manifest(output_dir, layout.pdf_hash, records)
+
+    results = []
+    for filename in filenames:
+        if filename in rendered:
+            results.append((filename, *rendered[filename]))
         else:
-            # Multi-page section - requires stitching
-            images_to_stitch = []
-            
-            # First page segment
-            page_start = self.document.load_page(start_page_idx)
-            pix_start = page_start.get_pixmap(matrix=fitz.Matrix(Config.DPI/72, Config.DPI/72))
-            img_start = Image.frombytes("RGB", [pix_start.width, pix_start.height], pix_start.samples)
-            
-            # Calculate crop box for the first page: from start_bbox.y0 to bottom of page
-            scale_factor = Config.DPI / 72
-            crop_start_page = (
-                int(page_start.rect.x0 * scale_factor),
-                int(start_bbox.y0 * scale_factor),
-                int(page_start.rect.x1 * scale_factor),
-                int(page_start.rect.y1 * scale_factor)
-            )
-            images_to_stitch.append(img_start.crop(crop_start_page))
-
-            # Intermediate pages
-            for p_idx in range(start_page_idx + 1, end_page_idx):
-                page_inter = self.document.load_page(p_idx)
-                pix_inter = page_inter.get_pixmap(matrix=fitz.Matrix(Config.DPI/72, Config.DPI/72))
-                images_to_stitch.append(Image.frombytes("RGB", [pix_inter.width, pix_inter.height], pix_inter.samples))
-
-            # Last page segment
-            page_end = self.document.load_page(end_page_idx)
-            pix_end = page_end.get_pixmap(matrix=fitz.Matrix(Config.DPI/72, Config.DPI/72))
-            img_end = Image.frombytes("RGB", [pix_end.width, pix_end.height], pix_end.samples)
-
-            # Calculate crop box for the last page: from top of page to end_bbox.y1
-            crop_end_page = (
-                int(page_end.rect.x0 * scale_factor),
-                int(page_end.rect.y0 * scale_factor),
-                int(page_end.rect.x1 * scale_factor),
-                int(end_bbox.y1 * scale_factor)
-            )
-            images_to_stitch.append(img_end.crop(crop_end_page))
-
-            # Stitch images vertically
-            widths, heights = zip(*(i.size for i in images_to_stitch))
-            max_width = max(widths)
-            total_height = sum(heights)
-
-            stitched_image = Image.new('RGB', (max_width, total_height))
-            y_offset = 0
-            for img in images_to_stitch:
-                stitched_image.paste(img, (0, y_offset))
-                y_offset += img.size[1]
-            
-            # Further refinement: the stitching above creates an image that is composed of segments.
-            # We want to ensure the final image is exactly the width of the content.
-            # We can re-calculate the overall left/right from the bounding boxes to refine the width.
-            overall_left = min(start_bbox.x0, end_bbox.x0)
-            overall_right = max(start_bbox.x1, end_bbox.x1)
-            for p_idx, d_bbox in details_bboxes:
-                overall_left = min(overall_left, d_bbox.x0)
-                overall_right = max(overall_right, d_bbox.x1)
-            
-            # Adjust the stitched image's width based on content
-            crop_stitched_width = (
-                int(overall_left * scale_factor) - 30,
-                0, # From top of stitched image
-                int(overall_right * scale_factor) + 30,
-                total_height # To bottom of stitched image
-            )
-            final_cropped_image = stitched_image.crop(crop_stitched_width)
+            output_path = os.path.join(output_dir, filename)
+            print(f"Unchanged: {output_path}")
+            results.append((filename, output_path, None))
+    return results
+
+
+# --- Direct Upload to Slack ---
+async def encode_sections_async(image_gen, sections):
+    """
+    Yields (name, filename, JPEG bytes) for every section, in order. Each
+    section is rendered in a worker thread, so the event loop keeps uploading
+    the previous captures meanwhile.
+    """
+    image_gen.plan_sections(sections)
+    for section in sections:
+        filename = image_gen.next_filename(section['name'])
+        data = await asyncio.to_thread(image_gen.encode_image, section)
+        yield section['name'], filename, data
 
-            final_cropped_image.save(output_path, dpi=(Config.DPI, Config.DPI))
-            print(f"Generated (stitched): {output_path}")
+
+def upload_captures(pdf_file_path, statement_month=None, document=None, layout=None, profile=None):
+    """
+    Renders every section to memory and uploads it to the matching vendor's
+    DM, without writing to Config.OUTPUT_DIR. Returns the number of captures sent.
+    """
+    # Importado acá: slack_sdk/aiohttp solo hacen falta para este modo.
+    from Envio_Automatico_Detalle import enviar_capturas
+
+    processor = None
+    try:
+        processor = PDFProcessor(pdf_file_path, document=document, layout=layout)
+        person_sections = processor.find_person_sections()
+        if not person_sections:
+            print("No consumption sections found in the PDF.")
+            return 0
+        image_gen = ImageGenerator(processor.document, None, profile, render_dpi(person_sections, profile))
+        return enviar_capturas(encode_sections_async(image_gen, person_sections), statement_month)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 0
+    finally:
+        if processor:
+            processor.close()
 
 
 # --- Main Application Logic ---
-def main(pdf_file_path):
+def main(pdf_file_path, output_dir=Config.OUTPUT_DIR, workers=1, incremental=False, profile=None):
     """
     Main function to orchestrate the PDF processing and image generation.
+    With workers > 1 the sections are rendered in a process pool. With
+    incremental=True only the pages and sections that changed since the
+    last incremental run are extracted and rendered again. `profile`
+    selects one of Config.RENDER_PROFILES.
+    Returns the list of generated image paths.
     """
+    generated = []
 
     if not os.path.exists(pdf_file_path):
         print(f"Error: PDF file not found at '{pdf_file_path}'")
-        return
+        return generated
 
     processor = None
     try:
         # Use a dynamic path for the PDF
-        processor = PDFProcessor(pdf_file_path)
+        processor = PDFProcessor(pdf_file_path, incremental=incremental)
         person_sections = processor.find_person_sections()
 
         if not person_sections:
             print("No consumption sections found in the PDF.")
-            return
+            return generated
 
-        image_gen = ImageGenerator(processor.document)
-        for section in person_sections:
-            image_gen.generate_image(section)
+        started = time.perf_counter()
+        if incremental:
+            results = render_sections_incremental(pdf_file_path, processor.document, processor.layout,
+                                                  person_sections, output_dir, workers, profile)
+        else:
+            results = render_sections(pdf_file_path, processor.document, person_sections, output_dir, workers, profile)
+        generated = [output_path for _, output_path, _ in results]
 
-        print(f"\nPDF processing complete. Images saved in '{Config.OUTPUT_DIR}' directory.")
+        print("\nRender time per section:")
+        for filename, _, seconds in results:
+            print(f"  {seconds:6.2f}s  {filename}" if seconds is not None else f"  {'reused':>7}  {filename}")
+        print(f"  Total: {time.perf_counter() - started:.2f}s ({workers} worker(s))")
+
+        print(f"\nPDF processing complete. Images saved in '{output_dir}' directory.")
 
     except ValueError as e:
         print(f"Error: {e}")
@@ -359,8 +864,27 @@ def main(pdf_file_path):
         if processor:
             processor.close()
 
+    return generated
+
 # --- Script Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera una captura JPG por vendedor a partir del resumen.")
     # Asegúrate de que el nombre del archivo PDF aquí sea el correcto.
-    pdf_path = '04-2025 - Gastos.pdf'
-    main(pdf_path)
\ No newline at end of file
+    parser.add_argument("pdf_path", nargs="?", default='04-2025 - Gastos.pdf')
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para renderizar las secciones en paralelo.")
+    parser.add_argument("--upload", action="store_true",
+                        help="Sube cada captura al DM del vendedor en Slack, sin escribir archivos.")
+    parser.add_argument("--month", default=None, help="Mes del resumen (AAAA-MM) para el registro de envíos.")
+    parser.add_argument("--profile", choices=sorted(Config.RENDER_PROFILES), default=Config.RENDER_PROFILE,
+                        help="Perfil de render: color, grises, 1 bit (PNG/TIFF G4) o color con DPI adaptativo.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo vuelve a renderizar las secciones cuyas páginas cambiaron desde la última corrida.")
+    args = parser.parse_args()
+    if args.upload:
+        if not os.path.exists(args.pdf_path):
+            print(f"Error: PDF file not found at '{args.pdf_path}'")
+        else:
+            upload_captures(args.pdf_path, args.month, profile=args.profile)
+    else:
+        main(args.pdf_path, workers=args.workers, incremental=args.incremental, profile=args.profile)
+    metrics.write_report()
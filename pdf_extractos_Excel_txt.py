@@ -2,204 +2,242 @@ import fitz  # PyMuPDF
 import pandas as pd
 import re
 import os
+import logging
 from datetime import datetime
-from openpyxl import load_workbook
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Border, Side, Font, Alignment
+from concurrent.futures import ProcessPoolExecutor
+import metrics
+from column_profiles import get_layout_profile
+from consumos_store import format_report, write_consumos_store
+from transaction_table import ROW_TOTAL, ROW_TRANSACTION, TransactionTable
+from pdf_layout import (DocumentLayout, extract_page_layouts, group_words_into_lines, load_layout, page_markers,
+                        pdf_content_hash, plan_page_range, read_cached_layout, write_cached_layout)
 
 # --- MODO DE DEPURACIÓN ---
-# Cambia a False para desactivar los mensajes de diagnóstico en la consola
-DEBUG_MODE = False
+# Los mensajes de diagnóstico van al logger del módulo, en nivel DEBUG.
+# Para verlos: EXTRACTOS_DEBUG=1 python pdf_extractos_Excel_txt.py
+log = logging.getLogger(__name__)
 
-# extract_transactions_from_pdf function (as previously modified, remains unchanged)
-def extract_transactions_from_pdf(pdf_path):
+# --- Extracción en dos fases ---
+# Fase 1: cada página se convierte, de forma independiente, en una lista de eventos.
+# Fase 2: una pasada secuencial y barata reconstruye el estado (vendedor actual,
+# columnas del encabezado) a través de los saltos de página.
+OUTPUT_COLUMNS = ["FECHA", "DESCRIPCIÓN", "NRO. CUPÓN", "PESOS", "DÓLARES"]
+
+CONSUMOS_PATTERN = re.compile(r"Consumos\s+([A-Z\s.]+)", re.IGNORECASE)
+TOTAL_CONSUMOS_PATTERN = re.compile(r"TOTAL CONSUMOS DE\s+([A-Z\s.]+)", re.IGNORECASE)
+
+EVENT_STOP = "STOP"                    # (EVENT_STOP, block_text)
+EVENT_COLUMN_HEADER = "COLUMN_HEADER"  # (EVENT_COLUMN_HEADER, block_text, block_coords, words sorted by x0)
+EVENT_SALESPERSON = "SALESPERSON"      # (EVENT_SALESPERSON, name)
+EVENT_TOTAL = "TOTAL"                  # (EVENT_TOTAL, block_text)
+EVENT_ROWS = "ROWS"                    # (EVENT_ROWS, [words of each candidate transaction line])
+
+# Páginas por tarea en la fase 1 paralela.
+PAGES_PER_TASK = 8
+
+# Filas por bloque al escribir el TXT de ancho fijo.
+TXT_CHUNK_ROWS = 10000
+
+
+@metrics.timed("extract.tokenize_page")
+def _tokenize_page(page):
     """
-    Extracts credit card transaction data for multiple salespeople from a PDF,
-    first into a dictionary keyed by salesperson, then into a DataFrame.
-    Includes total rows and blank lines as specified. Handles page breaks
-    and associates transactions with the correct salesperson.
+    Phase 1 of the extraction for a single PageLayout. Does not depend on
+    any other page, so pages can be tokenized in any order or process.
+    Returns (page_number, has_start_marker, events), with the page number
+    in the document.
     """
-    doc = fitz.open(pdf_path)
-    salesperson_data = {}
+    text_blocks = page.blocks
+    has_start_marker = any("DETALLE" in block[4] for block in text_blocks)
+
+    # Todas las palabras de la página se asignan a sus bloques de una sola vez
+    # (índice espacial por franjas de y) en lugar de recortar la página por bloque.
+    words_by_block = page.words_by_block()
+
+    events = []
+    for i, block in enumerate(text_blocks):
+        block_text = block[4].strip()
+
+        if re.search(r"Impuestos,\s*cargos\s*e\s*intereses", block_text, re.IGNORECASE) or \
+           re.search(r"Legales\s*y\s*avisos", block_text, re.IGNORECASE) or \
+           (re.search(r"Tarjetas\s*de\s*Crédito", block_text, re.IGNORECASE) and block[1] < 200):
+            events.append((EVENT_STOP, block_text))
+            break
+
+        block_text_upper = block_text.upper()
+        if "FECHA" in block_text_upper and ("PESOS" in block_text_upper or "DÓLARES" in block_text_upper):
+            events.append((EVENT_COLUMN_HEADER, block_text, block[:4], sorted(words_by_block[i], key=lambda x: x[0])))
+
+        consumos_match = CONSUMOS_PATTERN.match(block_text)
+        if consumos_match:
+            events.append((EVENT_SALESPERSON, consumos_match.group(1).strip()))
+            continue
+
+        if TOTAL_CONSUMOS_PATTERN.match(block_text_upper):
+            events.append((EVENT_TOTAL, block_text))
+            continue
+
+        if words_by_block[i]:
+            events.append((EVENT_ROWS, group_words_into_lines(words_by_block[i], 5)))
+
+    return page.number, has_start_marker, events
+
+
+def _tokenize_page_range(pdf_path, start, stop):
+    """
+    Worker task for the parallel phase 1: extracts pages [start, stop) with
+    PyMuPDF and tokenizes them. Returns the page layouts (to fill the cache),
+    the events of each page and its page_markers, so the parent can plan
+    the page range without reading the PDF again.
+    """
+    pages = extract_page_layouts(pdf_path, start, stop)
+    return pages, [_tokenize_page(page) for page in pages], [page_markers(page) for page in pages]
+
+
+def _tokenize_document(pdf_path, workers=1, incremental=False):
+    """
+    Runs phase 1 over the planned pages (see pdf_layout.plan_page_range) and
+    returns one (page_number, has_start_marker, events) tuple per page, in page order.
+    On a warm layout cache the PDF is not opened; otherwise, with
+    workers > 1, every page is extracted and tokenized in a process pool
+    and the results are trimmed to the planned range while merging them;
+    the cache is filled with the trimmed layout.
+    With incremental=True a cold cache only extracts the pages that changed
+    since the latest cached layout.
+    """
+    if incremental or workers <= 1:
+        return [_tokenize_page(page) for page in load_layout(pdf_path, incremental=incremental)]
+
+    pdf_hash = pdf_content_hash(pdf_path)
+    layout = read_cached_layout(pdf_hash)
+    if layout is not None:
+        return [_tokenize_page(page) for page in layout]
+
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    ranges = [(first, min(first + PAGES_PER_TASK, page_count)) for first in range(0, page_count, PAGES_PER_TASK)]
+
+    pages, page_events, markers = [], [], []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_tokenize_page_range, pdf_path, first, last) for first, last in ranges]
+        for future in futures:  # En orden de página, no de finalización.
+            range_pages, range_events, range_markers = future.result()
+            pages.extend(range_pages)
+            page_events.extend(range_events)
+            markers.extend(range_markers)
+
+    start, stop = plan_page_range(markers)
+    if start is None:
+        write_cached_layout(DocumentLayout(pdf_hash, [], None, page_count, page_count))
+        return []
+    write_cached_layout(DocumentLayout(pdf_hash, pages[start:stop], start, stop, page_count))
+    return page_events[start:stop]
+
+
+@metrics.timed("extract.stitch")
+def _stitch_page_events(page_events, profile):
+    """
+    Phase 2 of the extraction: a sequential pass over the page events that
+    carries the salesperson state machine across page breaks. Column
+    boundaries come from the layout profile (column_profiles).
+    Returns the rows as a TransactionTable (column buffers per salesperson),
+    with FECHA and the amounts still as raw strings (see
+    _normalize_salesperson_data).
+    """
+    output_columns = OUTPUT_COLUMNS
+    salesperson_data = TransactionTable(output_columns)
+    column_index = {col: idx for idx, col in enumerate(output_columns)}
+    description_idx, cupon_idx, pesos_idx = column_index["DESCRIPCIÓN"], column_index["NRO. CUPÓN"], column_index["PESOS"]
     
     start_extraction = False
     # --- Variables de estado simplificadas ---
     current_salesperson = None  # La ÚNICA variable que controla el estado principal
+    current_rows = None         # Buffers de columnas del vendedor actual
     current_headers_coords = {}
     col_mapping_order = []
     # -----------------------------------------
-    latest_date = None
-
-    output_columns = ["FECHA", "DESCRIPCIÓN", "NRO. CUPÓN", "PESOS", "DÓLARES"]
 
-    consumos_pattern = re.compile(r"Consumos\s+([A-Z\s.]+)", re.IGNORECASE)
-    total_consumos_pattern = re.compile(r"TOTAL CONSUMOS DE\s+([A-Z\s.]+)", re.IGNORECASE)
+    # Se consulta una sola vez: con el nivel DEBUG apagado no se arma ningún mensaje.
+    debug = log.isEnabledFor(logging.DEBUG)
 
-    for page_num in range(doc.page_count):
+    for page_num, has_start_marker, events in page_events:
         # --- DEBUG: INICIO DE PÁGINA ---
-        if DEBUG_MODE:
-            print("\n" + "="*50)
-            print(f"--- PROCESANDO PÁGINA {page_num + 1} ---")
-            print(f"[ESTADO INICIAL] Vendedor actual: '{current_salesperson}'. Coordenadas de encabezado presentes: {bool(current_headers_coords)}")
-            print("="*50)
+        if debug:
+            log.debug("--- PROCESANDO PÁGINA %d ---", page_num + 1)
+            log.debug("[ESTADO INICIAL] Vendedor actual: '%s'. Coordenadas de encabezado presentes: %s",
+                      current_salesperson, bool(current_headers_coords))
         # --- FIN DEBUG ---
-        page = doc.load_page(page_num)
-        text_blocks = page.get_text("blocks")
 
         if not start_extraction:
-            for block in text_blocks:
-                if "DETALLE" in block[4]:
-                    start_extraction = True
-                    if DEBUG_MODE: print("[INFO] 'DETALLE' encontrado. Iniciando extracción general.")
-                    break
-            if not start_extraction:
+            if has_start_marker:
+                start_extraction = True
+                if debug: log.debug("[INFO] 'DETALLE' encontrado. Iniciando extracción general.")
+            else:
                 continue
 
-        for i, block in enumerate(text_blocks):
-            block_text = block[4].strip()
+        for event in events:
+            event_type = event[0]
 
             # --- Lógica de PARADA (sin cambios) ---
-            if re.search(r"Impuestos,\s*cargos\s*e\s*intereses", block_text, re.IGNORECASE) or \
-               re.search(r"Legales\s*y\s*avisos", block_text, re.IGNORECASE) or \
-               (re.search(r"Tarjetas\s*de\s*Crédito", block_text, re.IGNORECASE) and block[1] < 200):
-                if DEBUG_MODE: print(f"[INFO] Condición de parada encontrada en bloque: '{block_text[:50]}...'. Finalizando extracción.")
+            if event_type == EVENT_STOP:
+                if debug: log.debug("[INFO] Condición de parada encontrada en bloque: '%s...'. Finalizando extracción.", event[1][:50])
                 start_extraction = False
                 current_salesperson = None
                 current_headers_coords = {}
                 col_mapping_order = []
                 break
 
-            is_header_block = "FECHA" in block_text.upper() and ("PESOS" in block_text.upper() or "DÓLARES" in block_text.upper())
-
-            if is_header_block and current_salesperson:
-                if DEBUG_MODE: print(f"[INFO] Analizando bloque que podría ser un encabezado para '{current_salesperson}': \"{block_text.replace(chr(10), ' ')}\"")
-                header_block_coords = block[:4]
-                words_in_header_block = page.get_text("words", clip=header_block_coords)
-                words_in_header_block.sort(key=lambda x: x[0])
-                is_cristian_palet = "CRISTIAN A PALET" in current_salesperson.upper()
-                target_headers = ["FECHA", "DESCRIPCIÓN", "NRO. CUPÓN"]
-                if is_cristian_palet and "DÓLARES" in block_text.upper() and block_text.upper().find("DÓLARES") < block_text.upper().find("PESOS"):
-                    target_headers.extend(["DÓLARES", "PESOS"])
-                else:
-                    target_headers.extend(["PESOS", "DÓLARES"])
-                
-                y_tolerance = 5
-                candidate_header_words = [w for w in words_in_header_block if abs(w[1] - header_block_coords[1]) < y_tolerance]
-                header_x0s = {}
-                for target_header in target_headers:
-                    found_x0 = None
-                    target_key = target_header.replace(' ', '').replace('.', '').upper()
-                    for word_info in candidate_header_words:
-                        if target_key in word_info[4].replace(' ', '').replace('.', '').upper():
-                            found_x0 = word_info[0]
-                            break
-                    if found_x0 is not None:
-                        header_x0s[target_header] = found_x0
-                    else:
-                        if target_header == "FECHA": header_x0s["FECHA"] = 36
-                        elif target_header == "DESCRIPCIÓN": header_x0s["DESCRIPCIÓN"] = 95
-                        elif target_header == "NRO. CUPÓN": header_x0s["NRO. CUPÓN"] = 300
-                        elif target_header == "PESOS": header_x0s["PESOS"] = 390
-                        elif target_header == "DÓLARES": header_x0s["DÓLARES"] = 480
-
-                TOLERANCIA = 6  # Margen de error en píxeles.
-
-                if DEBUG_MODE: print(f"[DEBUG] Coordenadas de encabezado originales: {header_x0s}")
-
-                # --- SOLUCIÓN: APLICAR MARGEN DE ERROR A TODAS LAS COLUMNAS ---
-                for col_name in header_x0s:
-                    original_x0 = header_x0s[col_name]
-                    header_x0s[col_name] = max(0, original_x0 - TOLERANCIA)
-                    if DEBUG_MODE:
-                        print(f"[FIX] Aplicada tolerancia de {TOLERANCIA}px a la columna '{col_name}'. Coordenada de inicio: {header_x0s[col_name]}")
-                
-                if DEBUG_MODE: print(f"[DEBUG] Coordenadas de encabezado finales con tolerancia: {header_x0s}")
+            if event_type == EVENT_COLUMN_HEADER and current_salesperson:
+                _, block_text, header_block_coords, words_in_header_block = event
+                if debug: log.debug("[INFO] Analizando bloque que podría ser un encabezado para '%s': \"%s\"", current_salesperson, block_text.replace(chr(10), ' '))
+                current_headers_coords = profile.resolve_columns(block_text, header_block_coords, words_in_header_block, current_salesperson)
+                col_mapping_order = list(current_headers_coords)
 
-                current_headers_coords = {}
-                col_mapping_order = []
-                for k_idx, col_name in enumerate(target_headers):
-                    x0 = header_x0s.get(col_name, 0)
-                    x1 = 1000
-
-                    if col_name == "FECHA":
-                        x1 = 95
-                    elif k_idx + 1 < len(target_headers):
-                        next_col_name = target_headers[k_idx + 1]
-                        if header_x0s.get(next_col_name):
-                            x1 = header_x0s.get(next_col_name)
-                        else:
-                            x1 = x0 + 100 
-                    
-                    current_headers_coords[col_name] = (x0, x1)
-                    col_mapping_order.append(col_name)
-                
-                if DEBUG_MODE:
-                    print(f"[INFO] ¡Encabezado confirmado y procesado! Orden de columnas: {col_mapping_order}")
-                    print(f"[DEBUG] Coordenadas de columna finales: {current_headers_coords}")
-
-            consumos_match = consumos_pattern.match(block_text)
-            if consumos_match:
-                current_salesperson = consumos_match.group(1).strip()
-                if current_salesperson not in salesperson_data:
-                    salesperson_data[current_salesperson] = []
-                if DEBUG_MODE: print(f"\n[INFO] CAMBIO DE CONTEXTO: Nuevo vendedor encontrado -> '{current_salesperson}'")
+                if debug:
+                    log.debug("[INFO] ¡Encabezado confirmado y procesado! Orden de columnas: %s", col_mapping_order)
+                    log.debug("[DEBUG] Coordenadas de columna finales: %s", current_headers_coords)
+                continue
+
+            if event_type == EVENT_SALESPERSON:
+                current_salesperson = event[1]
+                current_rows = salesperson_data.add_salesperson(current_salesperson)
+                if debug: log.debug("[INFO] CAMBIO DE CONTEXTO: Nuevo vendedor encontrado -> '%s'", current_salesperson)
                 
                 current_headers_coords = {}
                 col_mapping_order = []
-                if DEBUG_MODE: print("[INFO] Coordenadas de encabezado reseteadas. Esperando nuevo encabezado.")
+                if debug: log.debug("[INFO] Coordenadas de encabezado reseteadas. Esperando nuevo encabezado.")
                 continue
 
-            total_consumos_match = total_consumos_pattern.match(block_text.upper())
-            if total_consumos_match and current_salesperson:
-                if DEBUG_MODE: print(f"\n[INFO] CAMBIO DE CONTEXTO: Total encontrado para -> '{current_salesperson}'")
-                total_row_data = {col: "" for col in output_columns}
-                total_row_data["DESCRIPCIÓN"] = block_text.strip()
-                total_row_data["_TYPE"] = "TOTAL"
-                total_row_data["NAME"] = current_salesperson
+            if event_type == EVENT_TOTAL and current_salesperson:
+                block_text = event[1]
+                if debug: log.debug("[INFO] CAMBIO DE CONTEXTO: Total encontrado para -> '%s'", current_salesperson)
+                total_values = [""] * len(output_columns)
+                total_values[description_idx] = block_text.strip()
                 amounts = re.findall(r"([-+]?\d{1,3}(?:\.\d{3})*(?:,\d+)?|\d+,\d+)", block_text)
                 if len(amounts) >= 2:
-                    pesos_str_raw, dolares_str_raw = amounts[-2], amounts[-1]
-                    cleaned_pesos = pesos_str_raw.replace('.', '').replace(',', '.')
-                    if cleaned_pesos.endswith('-'): cleaned_pesos = '-' + cleaned_pesos[:-1]
-                    try: total_row_data["PESOS"] = float(cleaned_pesos)
-                    except ValueError: total_row_data["PESOS"] = ""
-                    cleaned_dolares = dolares_str_raw.replace('.', '').replace(',', '.')
-                    if cleaned_dolares.endswith('-'): cleaned_dolares = '-' + cleaned_dolares[:-1]
-                    try: total_row_data["DÓLARES"] = float(cleaned_dolares)
-                    except ValueError: total_row_data["DÓLARES"] = ""
-                if current_salesperson in salesperson_data:
-                     salesperson_data[current_salesperson].append(total_row_data)
+                    # Importes crudos: se convierten todos juntos en _normalize_salesperson_data.
+                    total_values[pesos_idx], total_values[column_index["DÓLARES"]] = amounts[-2], amounts[-1]
+                current_rows.append(ROW_TOTAL, total_values)
                 
                 current_salesperson = None
                 current_headers_coords = {}
                 col_mapping_order = []
-                if DEBUG_MODE: print("[INFO] Estado y coordenadas reseteados después del total.")
+                if debug: log.debug("[INFO] Estado y coordenadas reseteados después del total.")
                 continue
 
-            if current_salesperson and current_headers_coords:
-                current_block_words = page.get_text("words", clip=block[:4])
-                lines_grouped_by_y = {}
-                y_tolerance_lines = 5
-                for word_info in current_block_words:
-                    word_y0 = word_info[1]
-                    found_line = False
-                    for line_y_key in lines_grouped_by_y.keys():
-                        if abs(word_y0 - line_y_key) < y_tolerance_lines:
-                            lines_grouped_by_y[line_y_key].append(word_info)
-                            found_line = True
-                            break
-                    if not found_line:
-                        lines_grouped_by_y[word_y0] = [word_info]
-                
-                for line_y in sorted(lines_grouped_by_y.keys()):
-                    words_on_current_line = sorted(lines_grouped_by_y[line_y], key=lambda x: x[0])
+            if event_type == EVENT_ROWS and current_salesperson and current_headers_coords:
+                for words_on_current_line in event[1]:
                     
-                    if DEBUG_MODE:
-                        line_text_for_debug = ' '.join([w[4] for w in words_on_current_line])
-                        print(f"\n----------------------------------------------------")
-                        print(f"[DEBUG] Procesando línea de texto: {line_text_for_debug.split()}")
+                    if debug:
+                        log.debug("[DEBUG] Procesando línea de texto: %s", [w[4] for w in words_on_current_line])
 
-                    row_data = {col: "" for col in output_columns}
+                    row_values = [""] * len(output_columns)
                     temp_col_values = {col: [] for col in current_headers_coords.keys()}
 
                     for word_info in words_on_current_line:
@@ -211,74 +249,238 @@ def extract_transactions_from_pdf(pdf_path):
                     
                     for col_name in col_mapping_order:
                         extracted_value = " ".join(temp_col_values.get(col_name, [])).strip()
-                        if col_name in row_data:
-                            row_data[col_name] = extracted_value.replace('--', '-').replace(',,', ',').replace('. .', '.')
+                        if col_name in column_index:
+                            row_values[column_index[col_name]] = extracted_value.replace('--', '-').replace(',,', ',').replace('. .', '.')
                     
-                    nro_cupon_val = row_data.get("NRO. CUPÓN", "")
-                    if ' ' in nro_cupon_val and not row_data.get("PESOS"):
+                    nro_cupon_val = row_values[cupon_idx]
+                    if ' ' in nro_cupon_val and not row_values[pesos_idx]:
                         parts = nro_cupon_val.split(' ', 1)
                         if re.search(r'[\d,.-]+', parts[1]):
-                            row_data["NRO. CUPÓN"], row_data["PESOS"] = parts[0], parts[1]
+                            row_values[cupon_idx], row_values[pesos_idx] = parts[0], parts[1]
                     
-                    if DEBUG_MODE: print(f"[DEBUG] Fila construida: {row_data}")
+                    if debug: log.debug("[DEBUG] Fila construida: %s", dict(zip(output_columns, row_values)))
                     
-                    date_match = re.match(r"^\d{1,2}[-/\s]?(?:Jan|Ene|Feb|Mar|Abr|Apr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic)[-/\s]?\d{2}$", row_data["FECHA"], re.IGNORECASE)
+                    fecha = row_values[column_index["FECHA"]]
+                    date_match = re.match(r"^\d{1,2}[-/\s]?(?:Jan|Ene|Feb|Mar|Abr|Apr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic)[-/\s]?\d{2}$", fecha, re.IGNORECASE)
                     
                     if not date_match:
-                        if DEBUG_MODE: print(f"[DEBUG] Resultado del match de fecha para '{row_data['FECHA']}': RECHAZADO")
+                        if debug: log.debug("[DEBUG] Resultado del match de fecha para '%s': RECHAZADO", fecha)
                         continue
                     
-                    if DEBUG_MODE: print(f"[DEBUG] Resultado del match de fecha para '{row_data['FECHA']}': ACEPTADO")
-                    if DEBUG_MODE: print(f"[SUCCESS] Transacción guardada para {current_salesperson}: {row_data['FECHA']} - {row_data['DESCRIPCIÓN']}")
-
-                    month_map = {'ene': 'Jan', 'abr': 'Apr', 'ago': 'Aug', 'dic': 'Dec'}
-                    date_str = date_match.group(0).lower()
-                    for spa, eng in month_map.items():
-                        date_str = date_str.replace(spa, eng)
-
-                    try:
-                        date_str_normalized = date_str.replace(' ', '-').replace('--', '-')
-                        date_parts = date_str_normalized.split('-')
-                        if len(date_parts[-1]) == 2:
-                            full_year = (datetime.now().year // 100) * 100 + int(date_parts[-1])
-                            date_obj = datetime.strptime(f"{date_parts[0]}-{date_parts[1]}-{full_year}", "%d-%b-%Y")
-                        else:
-                            date_obj = datetime.strptime(date_str_normalized, "%d-%b-%Y")
-                        if latest_date is None or date_obj > latest_date:
-                            latest_date = date_obj
-                    except (ValueError, IndexError):
-                        pass
-
-                    for col in ["PESOS", "DÓLARES"]:
-                        if row_data[col]:
-                            amount_str = str(row_data[col]).replace('.', '').replace(',', '.')
-                            if amount_str.endswith('-'): amount_str = '-' + amount_str[:-1]
-                            try: row_data[col] = float(amount_str)
-                            except ValueError: row_data[col] = ""
-                    
-                    row_data["_TYPE"] = "TRANSACTION"
-                    row_data["NAME"] = current_salesperson
-                    if current_salesperson in salesperson_data:
-                        salesperson_data[current_salesperson].append(row_data)
-
-    doc.close()
-
-    final_data_for_df = []
-    for name, items_list in salesperson_data.items():
-        final_data_for_df.append({col: f"--- Consumos {name} ---" if col == "DESCRIPCIÓN" else "" for col in output_columns})
-        final_data_for_df.append({col: col for col in output_columns})
-        for item_dict in items_list:
-            final_data_for_df.append({col: item_dict.get(col, "") for col in output_columns})
-            if item_dict.get("_TYPE") == "TOTAL":
-                final_data_for_df.append({col: "" for col in output_columns})
-    
-    return pd.DataFrame(final_data_for_df, columns=output_columns), latest_date
+                    if debug:
+                        log.debug("[DEBUG] Resultado del match de fecha para '%s': ACEPTADO", fecha)
+                        log.debug("[SUCCESS] Transacción guardada para %s: %s - %s", current_salesperson, fecha, row_values[description_idx])
+
+                    current_rows.append(ROW_TRANSACTION, row_values)
+
+    return salesperson_data
+
+
+# --- Normalización de importes y fechas ---
+# Se hace una sola vez, sobre todas las filas, después del recorrido de la fase 2.
+AMOUNT_COLUMNS = ["PESOS", "DÓLARES"]
+MONTH_MAP = {'ene': 'Jan', 'abr': 'Apr', 'ago': 'Aug', 'dic': 'Dec'}
+
+
+def _to_decimal(amount_str):
+    try:
+        amount = Decimal(amount_str)
+    except InvalidOperation:
+        return ""
+    return amount if amount.is_finite() else ""
+
+
+def _to_float(amount_str):
+    # float() y no pd.to_numeric: acepta y rechaza exactamente lo mismo que
+    # el parseo fila por fila ('nan', '1_000', espacios) y siempre da float.
+    try:
+        return float(amount_str)
+    except ValueError:
+        return ""
+
+
+def parse_amounts(raw_amounts, as_decimal=False):
+    """
+    Converts Argentine-format amounts ('1.234,56', '1.234,56-') to float,
+    cleaning the strings in a single vectorized pass. Empty or unparseable
+    values become "".
+    With as_decimal=True the values are Decimal, so sums are exact.
+    """
+    cleaned = (pd.Series(raw_amounts, dtype=object).astype(str)
+               .str.replace('.', '', regex=False)
+               .str.replace(',', '.', regex=False)
+               .str.replace(r'^(.*)-$', r'-\1', regex=True))
+    if as_decimal:
+        return cleaned.map(_to_decimal).tolist()
+    return cleaned.map(_to_float).tolist()
+
+
+@lru_cache(maxsize=None)
+def parse_statement_date(fecha):
+    """
+    Parses a FECHA token such as '26-Abr-25'. Memoized by the raw token: a
+    statement only has a few dozen distinct dates. Returns None if invalid.
+    """
+    date_str = fecha.lower()
+    for spa, eng in MONTH_MAP.items():
+        date_str = date_str.replace(spa, eng)
+
+    try:
+        date_str_normalized = date_str.replace(' ', '-').replace('--', '-')
+        date_parts = date_str_normalized.split('-')
+        if len(date_parts[-1]) == 2:
+            full_year = (datetime.now().year // 100) * 100 + int(date_parts[-1])
+            return datetime.strptime(f"{date_parts[0]}-{date_parts[1]}-{full_year}", "%d-%b-%Y")
+        return datetime.strptime(date_str_normalized, "%d-%b-%Y")
+    except (ValueError, IndexError):
+        return None
+
+
+def validate_salesperson_totals(salesperson_data, decimal_amounts):
+    """
+    Checks that the transactions of each section add up to its
+    TOTAL CONSUMOS DE line, using exact Decimal sums. Prints a warning for
+    every mismatch and returns them as (salesperson, column, rows_sum, total).
+    `decimal_amounts` follows the row order of the TransactionTable.
+    """
+    mismatches = []
+    row_idx = 0
+    for name, rows in salesperson_data.salespeople.items():
+        sums = {col: Decimal(0) for col in AMOUNT_COLUMNS}
+        for row_type in rows.types:
+            amounts = decimal_amounts[row_idx]
+            row_idx += 1
+            if row_type != ROW_TOTAL:
+                for col, amount in zip(AMOUNT_COLUMNS, amounts):
+                    if amount != "":
+                        sums[col] += amount
+                continue
+            for col, total in zip(AMOUNT_COLUMNS, amounts):
+                if total != "" and total != sums[col]:
+                    mismatches.append((name, col, sums[col], total))
+                    print(f"Warning: TOTAL CONSUMOS DE {name} does not match its rows "
+                          f"({col}: rows {sums[col]:,.2f} vs total {total:,.2f})")
+            sums = {col: Decimal(0) for col in AMOUNT_COLUMNS}
+    return mismatches
+
+
+@metrics.timed("extract.normalize")
+def _normalize_salesperson_data(salesperson_data):
+    """
+    Converts the raw amount columns of the table to float in place,
+    validates the totals and returns the latest transaction date.
+    """
+    metrics.count("rows_parsed", len(salesperson_data))
+    raw_columns = {col: salesperson_data.column(col) for col in AMOUNT_COLUMNS}
+
+    validate_salesperson_totals(
+        salesperson_data,
+        list(zip(*(parse_amounts(raw_columns[col], as_decimal=True) for col in AMOUNT_COLUMNS))),
+    )
+
+    for col in AMOUNT_COLUMNS:
+        salesperson_data.replace_column(col, parse_amounts(raw_columns[col]))
+
+    fecha_idx = salesperson_data.column_names.index("FECHA")
+    transaction_dates = {
+        fecha
+        for rows in salesperson_data.salespeople.values()
+        for fecha, row_type in zip(rows.columns[fecha_idx], rows.types) if row_type == ROW_TRANSACTION
+    }
+    parsed_dates = [parse_statement_date(fecha) for fecha in transaction_dates]
+    return max((date_obj for date_obj in parsed_dates if date_obj is not None), default=None)
+
+
+def extract_transactions_from_pdf(pdf_path, workers=1, profile_name=None, incremental=False):
+    """
+    Extracts credit card transaction data for multiple salespeople from a PDF,
+    first into a dictionary keyed by salesperson, then into a DataFrame.
+    Includes total rows and blank lines as specified. Handles page breaks
+    and associates transactions with the correct salesperson.
+
+    Page text comes from the shared layout cache (pdf_layout), so reruns on an
+    unchanged statement skip the PyMuPDF text extraction. With workers > 1 and
+    a cold cache, pages are extracted and tokenized in parallel (phase 1) and
+    then stitched sequentially (phase 2); the result is identical to workers=1.
+
+    Column positions follow the layout profile `profile_name` from
+    layout_profiles.json (its default_profile when None). With
+    incremental=True only new or changed pages are read from the PDF.
+    """
+    return _build_transactions(_tokenize_document(pdf_path, workers, incremental), profile_name)
+
+
+def extract_transactions_from_layout(layout, profile_name=None):
+    """
+    Same as extract_transactions_from_pdf for a DocumentLayout that is
+    already loaded (for example, by the single-process pipeline).
+    """
+    return _build_transactions([_tokenize_page(page) for page in layout], profile_name)
+
+
+def _build_transactions(page_events, profile_name=None):
+    """
+    Phase 2, normalization and DataFrame construction from the page events.
+    Rows live in column buffers until the DataFrame is built, once, at the end.
+    """
+    salesperson_data = _stitch_page_events(page_events, get_layout_profile(profile_name))
+    latest_date = _normalize_salesperson_data(salesperson_data)
+    return salesperson_data.to_dataframe(), latest_date
+
+def _excel_column_widths(dataframe, title_text):
+    """
+    Column widths computed once from the DataFrame: the longest value of each
+    column (numbers measured as '1,234.56'), the header name, and the title
+    for column A, plus 2. PESOS and DÓLARES use a fixed width of 20.
+    """
+    widths = {}
+    for col_idx, col_name_str in enumerate(dataframe.columns):
+        series = dataframe[col_name_str]
+        series = series[series.notna()]
+        is_number = series.map(type).isin((int, float))
+
+        max_length = len(col_name_str)
+        if is_number.any():
+            max_length = max(max_length, int(series[is_number].map("{:,.2f}".format).str.len().max()))
+        if (~is_number).any():
+            max_length = max(max_length, int(series[~is_number].astype(str).str.len().max()))
+        if col_idx == 0 and title_text:
+            max_length = max(max_length, len(title_text))
+
+        widths[col_name_str] = 20 if col_name_str in ["PESOS", "DÓLARES"] else max_length + 2
+    return widths
+
+
+def _excel_row_classes(dataframe):
+    """
+    Vectorized row classification: the cleaned DESCRIPCIÓN column and a mask
+    of the heading rows (column header and TOTAL CONSUMOS DE lines) that get
+    a dotted border. Rows whose cells are all empty never get one.
+    """
+    description = dataframe["DESCRIPCIÓN"]
+    description_str = description.where(description.map(type) == str, "")
+    description_upper = description_str.str.upper()
+
+    is_total = description_upper.str.contains("TOTAL CONSUMOS DE", regex=False)
+    cleaned_total = description_upper.str.extract(r"(TOTAL CONSUMOS DE\s+[A-Z\s.]+)", expand=False).str.strip()
+    cleaned_description = description.where(~(is_total & cleaned_total.notna()), cleaned_total)
+
+    cleaned_str = cleaned_description.where(cleaned_description.map(type) == str, "")
+    is_heading = cleaned_str.str.startswith("TOTAL CONSUMOS DE") | cleaned_str.str.startswith("DESCRIPCIÓN")
+    is_blank = ~(dataframe.notna() & dataframe.astype(bool)).any(axis=1)
+    return cleaned_description, is_heading & ~is_blank
 
+
+@metrics.timed("excel.write")
 def save_to_excel(dataframe, latest_date, output_folder="output_excel", filename="transactions.xlsx"):
     """
     Saves a Pandas DataFrame to an Excel file in a specified folder,
     applying basic formatting.
 
+    Widths and row classes are computed up front from the DataFrame, and the
+    workbook is written in a single streaming pass (openpyxl write-only mode),
+    so no cell is read back or revisited.
+
     Args:
         dataframe (pandas.DataFrame): The DataFrame to save.
         latest_date (datetime): The latest date for the title.
@@ -290,99 +492,65 @@ def save_to_excel(dataframe, latest_date, output_folder="output_excel", filename
         print(f"Created folder: {output_folder}")
 
     output_path = os.path.join(output_folder, filename)
-
-    writer = pd.ExcelWriter(output_path, engine='openpyxl')
-    dataframe.to_excel(writer, index=False, sheet_name="Transactions", startrow=1, header=False)
-    
-    workbook = writer.book
-    sheet = writer.sheets["Transactions"]
-
     df_columns = list(dataframe.columns)
 
-    if latest_date:
-        title_month = latest_date.strftime("%B")
-        title_text = f"Monthly Consumption {title_month}"
-        sheet['A1'] = title_text
-        sheet['A1'].font = Font(bold=True, size=14)
-        sheet.merge_cells('A1:E1')
-        title_cell = sheet['A1']
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
+    title_text = f"Monthly Consumption {latest_date.strftime('%B')}" if latest_date else None
+    column_widths = _excel_column_widths(dataframe, title_text)
 
-    for col_idx, col_name_str in enumerate(df_columns):
-        max_length = 0
-        column_letter = get_column_letter(col_idx + 1)
-        column = sheet.column_dimensions[column_letter]
-        
-        header_length = len(col_name_str)
-        max_length = max(max_length, header_length)
-        for cell in sheet[column_letter]:
-            try:
-                if cell.value is not None:
-                    cell_length = len(str(cell.value))
-                    if isinstance(cell.value, (int, float)):
-                        cell_length = len(f"{cell.value:,.2f}")
-                    max_length = max(max_length, cell_length)
-            except:
-                pass
-        
-        adjusted_width = (max_length + 2)
-
-        if col_name_str in ["PESOS", "DÓLARES"]:
-            column.width = 20
-        else:
-            column.width = adjusted_width
-    
-    try:
-        pesos_col_letter_idx = df_columns.index("PESOS") + 1
-        dollars_col_letter_idx = df_columns.index("DÓLARES") + 1
-        description_col_letter_idx = df_columns.index("DESCRIPCIÓN") + 1
-        fecha_col_letter_idx = df_columns.index("FECHA") + 1
-    except ValueError:
+    formatting = all(col in df_columns for col in ["FECHA", "DESCRIPCIÓN", "NRO. CUPÓN", "PESOS", "DÓLARES"])
+    if formatting:
+        cleaned_description, border_rows = _excel_row_classes(dataframe)
+        dataframe = dataframe.assign(**{"DESCRIPCIÓN": cleaned_description})
+        currency_columns = {df_columns.index("PESOS"), df_columns.index("DÓLARES")}
+    else:
         print("Error: One of the expected columns is not in the DataFrame.")
-        writer.close()
-        return
-
-    custom_currency_format = '_-$ * #,##0.00_-;-$ * #,##0.00_-;_-$ * "-"??_-;_-@_-'
 
-    for row_idx in range(2, sheet.max_row + 1):
-        pesos_cell = sheet.cell(row=row_idx, column=pesos_col_letter_idx)
-        if isinstance(pesos_cell.value, (int, float)):
-            pesos_cell.number_format = custom_currency_format
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Transactions")
+    for col_idx, col_name_str in enumerate(df_columns):
+        sheet.column_dimensions[get_column_letter(col_idx + 1)].width = column_widths[col_name_str]
 
-        dollars_cell = sheet.cell(row=row_idx, column=dollars_col_letter_idx)
-        if isinstance(dollars_cell.value, (int, float)):
-            dollars_cell.number_format = custom_currency_format
+    if title_text:
+        title_cell = WriteOnlyCell(sheet, value=title_text)
+        title_cell.font = Font(bold=True, size=14)
+        title_cell.alignment = Alignment(horizontal='center', vertical='center')
+        sheet.append([title_cell])
+        sheet.merged_cells.add(f"A1:{get_column_letter(max(len(df_columns), 5))}1")
+    else:
+        sheet.append([])
 
-        description_cell = sheet.cell(row=row_idx, column=description_col_letter_idx)
-        if description_cell.value and "TOTAL CONSUMOS DE" in str(description_cell.value).upper():
-            match = re.search(r"(TOTAL CONSUMOS DE\s+[A-Z\s.]+)", str(description_cell.value).upper())
-            if match:
-                description_cell.value = match.group(1).strip()
+    custom_currency_format = '_-$ * #,##0.00_-;-$ * #,##0.00_-;_-$ * "-"??_-;_-@_-'
 
     thin_dotted_border = Border(left=Side(style='dotted'),
                                 right=Side(style='dotted'),
                                 top=Side(style='dotted'),
                                 bottom=Side(style='dotted'))
 
-    for row_idx in range(2, sheet.max_row + 1):
-        for col_idx in range(1, sheet.max_column + 1):
-            cell = sheet.cell(row=row_idx, column=col_idx)
-            is_heading_row = False
-            description_cell_value = sheet.cell(row=row_idx, column=description_col_letter_idx).value
-            if description_cell_value and (str(description_cell_value).startswith("TOTAL CONSUMOS DE") or
-                                          str(description_cell_value).startswith("DESCRIPCIÓN")):
-                is_heading_row = True
-            
-            is_blank_row = not any(sheet.cell(row=row_idx, column=c_idx).value for c_idx in range(1, sheet.max_column + 1))
-
-            if is_heading_row and not is_blank_row:
+    border_flags = border_rows.tolist() if formatting else [False] * len(dataframe)
+    for values, has_border in zip(dataframe.itertuples(index=False, name=None), border_flags):
+        row = []
+        for col_idx, value in enumerate(values):
+            if isinstance(value, float) and value != value:
+                value = None
+            is_currency = formatting and col_idx in currency_columns and isinstance(value, (int, float))
+            if not (has_border or is_currency):
+                row.append(value)
+                continue
+            cell = WriteOnlyCell(sheet, value=value)
+            if is_currency:
+                cell.number_format = custom_currency_format
+            if has_border:
                 cell.border = thin_dotted_border
-    
-    writer.close()
+            row.append(cell)
+        sheet.append(row)
+
+    workbook.save(output_path)
+    metrics.count("excel_bytes_written", os.path.getsize(output_path))
     print(f"Data successfully saved to {output_path}")
 
 
 # <<< NUEVO >>>: Función para guardar los datos en un archivo de texto
+@metrics.timed("txt.write")
 def save_to_txt(dataframe, latest_date, output_folder="output_txt", filename="consumos.txt"):
     """
     Guarda un DataFrame en un archivo de texto con formato de ancho fijo.
@@ -399,7 +567,62 @@ def save_to_txt(dataframe, latest_date, output_folder="output_txt", filename="co
         print(f"Created folder: {output_folder}")
 
     output_path = os.path.join(output_folder, filename)
+    df_txt, col_widths = _prepare_txt_layout(dataframe)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        # 2. Escribir el título si existe la fecha
+        if latest_date:
+            title_month = latest_date.strftime("%B")
+            title_text = f"Monthly Consumption {title_month}"
+            f.write(title_text.center(sum(col_widths.values())))
+            f.write("\n\n")
 
+        # 3. Escribir las líneas ya formateadas por columnas, en bloques
+        for chunk in _render_fixed_width_chunks(df_txt, col_widths):
+            f.write(chunk)
+    metrics.count("txt_bytes_written", os.path.getsize(output_path))
+
+    print(f"Data successfully saved to {output_path}")
+
+
+def _format_fixed_width_column(series, width):
+    """
+    Formats a whole column at once: numbers as '1,234.56' right-aligned,
+    everything else as text left-aligned (empty for missing values).
+    Same rules as format_fixed_width_line, applied per column.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.map("{:,.2f}".format).str.rjust(width)
+
+    is_number = series.map(lambda value: isinstance(value, (int, float)))
+    formatted = pd.Series("", index=series.index, dtype=object)
+    formatted[is_number] = series[is_number].map("{:,.2f}".format).str.rjust(width)
+    texts = series[~is_number]
+    formatted[~is_number] = texts.where(texts.notna(), "").astype(str).str.ljust(width)
+    return formatted
+
+
+def _render_fixed_width_chunks(df_txt, col_widths, chunk_rows=TXT_CHUNK_ROWS):
+    """
+    Renders df_txt as fixed-width lines, one column at a time instead of
+    row by row, and yields them as text blocks of `chunk_rows` lines.
+    """
+    if df_txt.empty:
+        return
+    lines = None
+    for col in df_txt.columns:
+        formatted = _format_fixed_width_column(df_txt[col], col_widths[col])
+        lines = formatted if lines is None else lines + formatted
+    lines = lines.str.rstrip().tolist()
+    for start in range(0, len(lines), chunk_rows):
+        yield "\n".join(lines[start:start + chunk_rows]) + "\n"
+
+
+def _prepare_txt_layout(dataframe):
+    """
+    Returns the DataFrame with cleaned total descriptions and the fixed width
+    of every column, shared by save_to_txt and save_to_jsonl.
+    """
     # <<< CORRECCIÓN >>>: Se crea una copia del DataFrame para limpiarlo sin afectar el original (que usa el Excel).
     df_txt = dataframe.copy()
 
@@ -434,42 +657,83 @@ def save_to_txt(dataframe, latest_date, output_folder="output_txt", filename="co
     if "DESCRIPCIÓN" in col_widths:
          col_widths["DESCRIPCIÓN"] = 50
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        # 2. Escribir el título si existe la fecha
-        if latest_date:
-            title_month = latest_date.strftime("%B")
-            title_text = f"Monthly Consumption {title_month}"
-            f.write(title_text.center(sum(col_widths.values())))
-            f.write("\n\n")
+    return df_txt, col_widths
 
-        # 3. Iterar por cada fila del DataFrame limpio 'df_txt'
-        for index, row in df_txt.iterrows():
-            line_parts = []
-            for col_name in df_txt.columns:
-                value = row[col_name]
-                
-                if isinstance(value, (int, float)):
-                    formatted_val = f"{value:,.2f}"
-                    line_parts.append(formatted_val.rjust(col_widths[col_name]))
-                else:
-                    formatted_val = str(value if pd.notna(value) else "")
-                    line_parts.append(formatted_val.ljust(col_widths[col_name]))
 
-            line = "".join(line_parts)
-            f.write(line.rstrip() + '\n')
+@metrics.timed("jsonl.write")
+def save_to_jsonl(dataframe, latest_date, output_folder="output_txt", filename="consumos.jsonl"):
+    """
+    Guarda las filas de cada vendedor en un JSONL tipado (los importes siguen
+    siendo números) junto con un índice de offsets por vendedor, para que el
+    envío a Slack lea solo las filas de cada vendedor sin parsear consumos.txt.
+
+    Args:
+        dataframe (pandas.DataFrame): El DataFrame devuelto por extract_transactions_from_pdf.
+        latest_date (datetime): La fecha más reciente (define el mes del resumen).
+        output_folder (str): La carpeta donde se guardará el archivo.
+        filename (str): El nombre del archivo JSONL; el índice se guarda al lado.
+    """
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"Created folder: {output_folder}")
+
+    output_path = os.path.join(output_folder, filename)
+    df_txt, col_widths = _prepare_txt_layout(dataframe)
+    vendor_rows = _vendor_rows(df_txt)
 
+    write_consumos_store(vendor_rows, list(df_txt.columns), col_widths, latest_date, output_path)
+    metrics.count("jsonl_bytes_written", os.path.getsize(output_path))
     print(f"Data successfully saved to {output_path}")
 
 
+def build_vendor_reports(dataframe):
+    """
+    The report of every vendor as the sender formats it from consumos.jsonl,
+    built in memory from the DataFrame. Returns {vendor: report text}.
+    """
+    df_txt, col_widths = _prepare_txt_layout(dataframe)
+    columns = list(df_txt.columns)
+    return {vendor: format_report(rows, columns, col_widths) for vendor, rows in _vendor_rows(df_txt).items()}
+
+
+def _vendor_rows(df_txt):
+    """
+    Groups the rows of the cleaned DataFrame by vendor, tagged with _TYPE
+    (TRANSACTION, TOTAL or BLANK). Section titles and column headers are dropped.
+    """
+    columns = list(df_txt.columns)
+    vendor_rows = {}
+    current_rows = None
+    for values in df_txt.itertuples(index=False, name=None):
+        row = dict(zip(columns, values))
+        description = row["DESCRIPCIÓN"]
+        if isinstance(description, str) and description.startswith("--- Consumos "):
+            current_rows = vendor_rows.setdefault(description[len("--- Consumos "):-len(" ---")], [])
+        elif current_rows is None or row["FECHA"] == "FECHA":
+            continue  # Encabezado de columnas: no es un dato.
+        elif not any(v != "" for v in values):
+            current_rows.append({"_TYPE": "BLANK", **row})  # Separador después de cada total.
+        elif isinstance(description, str) and description.upper().startswith("TOTAL CONSUMOS DE"):
+            current_rows.append({"_TYPE": "TOTAL", **row})
+        else:
+            current_rows.append({"_TYPE": "TRANSACTION", **row})
+    return vendor_rows
+
+
 # This block allows the script to be run directly
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG if os.getenv("EXTRACTOS_DEBUG") else logging.WARNING, format="%(message)s")
     pdf_file_path = "pdfs/04-2025 - Gastos.pdf"  # Make sure this PDF is in the same directory as the script
 
     if not os.path.exists(pdf_file_path):
         print(f"Error: PDF file not found at '{pdf_file_path}'")
     else:
         print(f"Extracting data from {pdf_file_path}...")
-        extracted_data_df, latest_date_found = extract_transactions_from_pdf(pdf_file_path)
+        # EXTRACTOS_INCREMENTAL=1: solo se extraen las páginas que cambiaron desde la última corrida.
+        # EXTRACTOS_WORKERS=N: con la caché fría, las páginas se extraen en N procesos.
+        extracted_data_df, latest_date_found = extract_transactions_from_pdf(
+            pdf_file_path, workers=int(os.getenv("EXTRACTOS_WORKERS", "1")),
+            incremental=bool(os.getenv("EXTRACTOS_INCREMENTAL")))
 
         if not extracted_data_df.empty:
             print(f"Extracted {len(extracted_data_df)} records (including headings/totals/blanks).")
@@ -479,6 +743,10 @@ if __name__ == "__main__":
             
             # <<< NUEVO >>>: Guardar en TXT (nueva función)
             save_to_txt(extracted_data_df, latest_date_found)
+
+            # Formato intermedio tipado e indexado que consume el envío a Slack
+            save_to_jsonl(extracted_data_df, latest_date_found)
             
         else:
-            print("No transaction data extracted.")
\ No newline at end of file
+            print("No transaction data extracted.")
+    metrics.write_report()
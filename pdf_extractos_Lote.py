@@ -0,0 +1,144 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pdf_extractos_Capturas
+from pdf_extractos_Excel_txt import extract_transactions_from_pdf, save_to_excel, save_to_jsonl, save_to_txt
+
+# --- Configuration Module ---
+class BatchConfig:
+    """
+    Configuration settings for batch processing of several statements.
+    """
+    OUTPUT_ROOT = "output_lote"
+    SUMMARY_FILENAME = "resumen.json"
+    TOTAL_PATTERN = re.compile(r"TOTAL CONSUMOS DE\s+([A-Z\s.]+?)\s*[-+]?\d", re.IGNORECASE)
+
+
+def find_statements(folder_or_glob):
+    """
+    Resolves a folder (every *.pdf inside it) or a glob pattern into a sorted
+    list of PDF paths, so the processing order never depends on the filesystem.
+    """
+    if os.path.isdir(folder_or_glob):
+        pattern = os.path.join(folder_or_glob, "*.pdf")
+    else:
+        pattern = folder_or_glob
+    return sorted(path for path in glob.glob(pattern) if path.lower().endswith(".pdf"))
+
+
+def _summarize_dataframe(dataframe):
+    """
+    Counts transactions and adds up the TOTAL CONSUMOS DE lines of every
+    salesperson from the DataFrame returned by extract_transactions_from_pdf.
+    """
+    transactions = 0
+    totals = {}
+    for fecha, description, pesos, dolares in zip(dataframe["FECHA"], dataframe["DESCRIPCIÓN"],
+                                                  dataframe["PESOS"], dataframe["DÓLARES"]):
+        if fecha and fecha != "FECHA":
+            transactions += 1
+        elif isinstance(description, str) and description.upper().startswith("TOTAL CONSUMOS DE"):
+            match = BatchConfig.TOTAL_PATTERN.match(description)
+            name = match.group(1).strip() if match else description
+            # Un vendedor puede tener varias secciones (y varias líneas de total): se suman.
+            entry = totals.setdefault(name, {"PESOS": None, "DÓLARES": None})
+            for column, amount in (("PESOS", pesos), ("DÓLARES", dolares)):
+                if isinstance(amount, float):
+                    entry[column] = (entry[column] or 0.0) + amount
+    return transactions, totals
+
+
+def process_statement(pdf_path, output_root=BatchConfig.OUTPUT_ROOT, captures=True):
+    """
+    Runs the Excel/TXT extraction and the capture generation for one statement.
+    Every output goes to <output_root>/<statement name>/. Runs in a worker process.
+    """
+    started = time.perf_counter()
+    statement = os.path.splitext(os.path.basename(pdf_path))[0]
+    statement_dir = os.path.join(output_root, statement)
+
+    dataframe, latest_date = extract_transactions_from_pdf(pdf_path)
+    transactions, totals = _summarize_dataframe(dataframe)
+    if not dataframe.empty:
+        save_to_excel(dataframe, latest_date, output_folder=statement_dir)
+        save_to_txt(dataframe, latest_date, output_folder=statement_dir)
+        save_to_jsonl(dataframe, latest_date, output_folder=statement_dir)
+
+    capture_paths = []
+    if captures:
+        capture_paths = pdf_extractos_Capturas.main(pdf_path, os.path.join(statement_dir, "capturas"))
+
+    return {
+        "statement": statement,
+        "pdf_path": pdf_path,
+        "latest_date": latest_date.strftime("%Y-%m-%d") if latest_date else None,
+        "salespeople": len(totals),
+        "transactions": transactions,
+        "totals": totals,
+        "captures": len([path for path in capture_paths if path]),
+        "output_dir": statement_dir,
+        "elapsed_seconds": time.perf_counter() - started,
+    }
+
+
+def run_batch(folder_or_glob, output_root=BatchConfig.OUTPUT_ROOT, workers=None, captures=True):
+    """
+    Processes every statement in a ProcessPoolExecutor and writes a combined
+    summary. The summary is ordered by PDF path and leaves out timings, so the
+    same input always produces the same file regardless of completion order.
+    """
+    pdf_paths = find_statements(folder_or_glob)
+    if not pdf_paths:
+        print(f"Error: No PDF files found for '{folder_or_glob}'")
+        return None
+
+    os.makedirs(output_root, exist_ok=True)
+    print(f"Processing {len(pdf_paths)} statements with {workers or os.cpu_count()} workers...")
+
+    results = {}
+    failures = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_statement, path, output_root, captures): path for path in pdf_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+                print(f"Done: {path} ({results[path]['elapsed_seconds']:.1f}s)")
+            except Exception as e:
+                failures[path] = str(e)
+                print(f"Error processing '{path}': {e}")
+
+    statements = []
+    for path in pdf_paths:
+        if path in results:
+            entry = dict(results[path])
+            entry.pop("elapsed_seconds")
+            statements.append(entry)
+
+    summary = {
+        "statements": statements,
+        "failed": [{"pdf_path": path, "error": failures[path]} for path in pdf_paths if path in failures],
+        "total_transactions": sum(entry["transactions"] for entry in statements),
+    }
+
+    summary_path = os.path.join(output_root, BatchConfig.SUMMARY_FILENAME)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"\nSummary saved to {summary_path}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae transacciones y capturas de varios resúmenes en paralelo.")
+    parser.add_argument("source", help="Carpeta con PDFs o patrón glob (por ejemplo 'pdfs/*-2025 - Gastos.pdf').")
+    parser.add_argument("--output", default=BatchConfig.OUTPUT_ROOT, help="Carpeta raíz de salida.")
+    parser.add_argument("--workers", type=int, default=None, help="Cantidad de procesos (por defecto, todos los núcleos).")
+    parser.add_argument("--no-captures", action="store_true", help="Omite la generación de capturas JPG.")
+    args = parser.parse_args()
+
+    run_batch(args.source, args.output, args.workers, captures=not args.no_captures)
@@ -0,0 +1,132 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+
+import metrics
+from pdf_extractos_Capturas import (Config as CapturesConfig, PDFProcessor, render_sections,
+                                    render_sections_incremental, upload_captures)
+from pdf_extractos_Excel_txt import (build_vendor_reports, extract_transactions_from_layout,
+                                     save_to_excel, save_to_jsonl, save_to_txt)
+from pdf_layout import load_layout
+
+# --- Configuration Module ---
+class PipelineConfig:
+    """
+    Configuration settings for the single-process monthly run. The output
+    folders are the same ones the individual scripts use.
+    """
+    EXCEL_DIR = "output_excel"
+    TXT_DIR = "output_txt"
+    CAPTURES_DIR = CapturesConfig.OUTPUT_DIR
+
+
+def _write_files(dataframe, latest_date, excel_dir, txt_dir):
+    """
+    Excel, TXT and JSONL outputs. Runs in a thread, next to capture rendering.
+    """
+    save_to_excel(dataframe, latest_date, output_folder=excel_dir)
+    save_to_txt(dataframe, latest_date, output_folder=txt_dir)
+    save_to_jsonl(dataframe, latest_date, output_folder=txt_dir)
+
+
+def _send_reports(reports, statement_month):
+    # Importado acá: slack_sdk/aiohttp solo hacen falta cuando se envía.
+    from Envio_Automatico_Detalle import enviar_reportes
+    return enviar_reportes(reports, statement_month)
+
+
+def _render_captures(pdf_path, document, layout, output_dir, incremental=False):
+    """
+    Finds the salesperson sections on the shared layout and renders them
+    from the already open document (only the changed ones if incremental).
+    """
+    processor = PDFProcessor(pdf_path, document=document, layout=layout)
+    try:
+        sections = processor.find_person_sections()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return []
+    if not sections:
+        print("No consumption sections found in the PDF.")
+        return []
+    if incremental:
+        results = render_sections_incremental(pdf_path, document, layout, sections, output_dir)
+    else:
+        results = render_sections(pdf_path, document, sections, output_dir)
+    return [output_path for _, output_path, _ in results]
+
+
+def run_pipeline(pdf_path, send=False, captures=True, upload_captures_to_slack=False, incremental=False,
+                 excel_dir=PipelineConfig.EXCEL_DIR, txt_dir=PipelineConfig.TXT_DIR,
+                 captures_dir=PipelineConfig.CAPTURES_DIR):
+    """
+    The whole monthly run in one process: the PDF is opened once, its layout
+    is read once, and the DataFrame and the vendor reports are passed in
+    memory to every stage. Excel/TXT/JSONL writing and (optionally) Slack
+    delivery run in threads while the captures are rendered. With
+    upload_captures_to_slack the captures go straight from memory to each
+    vendor's DM instead of to captures_dir. With incremental, only the
+    pages and captures that changed since the last incremental run are
+    extracted and rendered again.
+    Returns a summary dict, or None if nothing could be extracted.
+    """
+    if not os.path.exists(pdf_path):
+        print(f"Error: PDF file not found at '{pdf_path}'")
+        return None
+
+    started = time.perf_counter()
+    with metrics.span("pdf.open"):
+        document = fitz.open(pdf_path)
+    try:
+        layout = load_layout(pdf_path, document=document, incremental=incremental)
+        dataframe, latest_date = extract_transactions_from_layout(layout)
+        if dataframe.empty:
+            print("No transaction data extracted.")
+            return None
+        print(f"Extracted {len(dataframe)} records (including headings/totals/blanks).")
+
+        reports = build_vendor_reports(dataframe)
+        statement_month = latest_date.strftime("%Y-%m") if latest_date else None
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            files = executor.submit(_write_files, dataframe, latest_date, excel_dir, txt_dir)
+            delivery = executor.submit(_send_reports, reports, statement_month) if send else None
+            capture_paths, uploaded = [], 0
+            if captures and upload_captures_to_slack:
+                uploaded = upload_captures(pdf_path, statement_month, document, layout)
+            elif captures:
+                capture_paths = _render_captures(pdf_path, document, layout, captures_dir, incremental)
+            files.result()
+            sent = delivery.result() if delivery else 0
+    finally:
+        document.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\nPipeline complete in {elapsed:.2f}s: {len(reports)} reports, "
+          f"{len(capture_paths)} captures saved, {uploaded} uploaded, {sent} sent.")
+    return {
+        "reports": len(reports),
+        "captures": capture_paths,
+        "captures_uploaded": uploaded,
+        "sent": sent,
+        "elapsed_seconds": elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Corrida mensual completa: Excel, TXT, capturas y (opcional) envío a Slack.")
+    parser.add_argument("pdf_path", nargs="?", default="pdfs/04-2025 - Gastos.pdf")
+    parser.add_argument("--send", action="store_true", help="Envía los reportes por Slack al terminar la extracción.")
+    parser.add_argument("--no-captures", action="store_true", help="Omite la generación de capturas JPG.")
+    parser.add_argument("--upload-captures", action="store_true",
+                        help="Sube las capturas directo a Slack desde memoria en lugar de guardarlas.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reprocesa solo las páginas y capturas que cambiaron desde la última corrida.")
+    args = parser.parse_args()
+
+    run_pipeline(args.pdf_path, send=args.send, captures=not args.no_captures,
+                 upload_captures_to_slack=args.upload_captures, incremental=args.incremental)
+    metrics.write_report()
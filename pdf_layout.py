@@ -0,0 +1,540 @@
+import fitz  # PyMuPDF
+import hashlib
+import os
+import pickle
+import re
+import zlib
+from array import array
+from bisect import bisect_left, insort
+
+import metrics
+
+# --- Configuration Module ---
+class LayoutConfig:
+    """
+    Configuration settings for the on-disk page layout cache.
+    """
+    CACHE_DIR = ".layout_cache"
+    CACHE_EXTENSION = ".layout"
+    # Se incrementa cuando cambia el formato binario (o la extracción, o el hash
+    # por página) para invalidar cachés viejas.
+    FORMAT_VERSION = 6
+    # Apunta al último layout escrito: base del modo incremental.
+    LATEST_POINTER = "latest"
+    HASH_CHUNK_SIZE = 1024 * 1024
+    # Alto (en puntos) de cada franja del índice espacial de palabras.
+    Y_BIN_HEIGHT = 12
+    # Distancia (en puntos) a la que una palabra ajena obliga a recortar un bloque
+    # con PyMuPDF en lugar de asignarle palabras enteras (ver PageLayout.from_page).
+    CLIP_MARGIN = 1
+    # Tolerancia vertical (en puntos) para considerar dos palabras en la misma línea.
+    LINE_Y_TOLERANCE = 5
+    # Planificación de páginas: ambos extractores empiezan en la primera página con
+    # START_MARKER y nada después de la página de legales les sirve.
+    START_MARKER = "DETALLE"
+    STOP_PATTERN = re.compile(r"Legales\s*y\s*avisos", re.IGNORECASE)
+
+
+# --- Page Layout Module ---
+class PageLayout:
+    """
+    Words and blocks of a single page, exactly as returned by
+    page.get_text("words") and page.get_text("blocks"), plus the hash of the
+    page content (see page_content_hash).
+    `clipped` holds, for the few blocks that words of other blocks cross
+    into, page.get_text("words", clip=block) as PyMuPDF returns it (see
+    words_by_block).
+    """
+    __slots__ = ("number", "rect", "words", "blocks", "content_hash", "clipped", "_y_bins")
+
+    def __init__(self, number, rect, words, blocks, content_hash=None, clipped=None):
+        self.number = number
+        self.rect = rect      # (x0, y0, x1, y1) de la página
+        self.words = words    # [(x0, y0, x1, y1, "word", block_no, line_no, word_no), ...]
+        self.blocks = blocks  # [(x0, y0, x1, y1, "text", block_no, block_type), ...]
+        self.content_hash = content_hash
+        self.clipped = clipped or {}  # {índice de bloque: [palabras recortadas], ...}
+        self._y_bins = None
+
+    def __reduce__(self):
+        # El índice espacial se reconstruye bajo demanda; no viaja entre procesos.
+        return (PageLayout, (self.number, self.rect, self.words, self.blocks, self.content_hash, self.clipped))
+
+    @classmethod
+    @metrics.timed("layout.page_text")
+    def from_page(cls, page, content_hash=None, textpage=None):
+        """
+        Runs the PyMuPDF text extraction for a page. This is the only place
+        where text is read from the PDF itself. Words and blocks come from
+        a single TextPage (`textpage` if the planner already built it), built
+        with the flags get_text("words") and get_text("blocks") use on their own.
+        `content_hash` is only known (and worth its cost) in incremental mode.
+        """
+        metrics.count("pages_extracted")
+        # Sin flags, get_textpage() pierde espacios (tabs), ligaduras y el recorte al MediaBox.
+        textpage = textpage or page.get_textpage(flags=fitz.TEXTFLAGS_WORDS)
+        layout = cls(page.number, tuple(page.rect), page.get_text("words", textpage=textpage),
+                     page.get_text("blocks", textpage=textpage), content_hash)
+        # El recorte de PyMuPDF es por carácter (la caja ajustada de cada glifo), y
+        # eso no se deduce de la caja de la palabra: los bloques a los que entra una
+        # palabra ajena se recortan de verdad. En un resumen normal no hay ninguno.
+        for idx in _touching_blocks(layout.blocks, LayoutConfig.CLIP_MARGIN):
+            block = layout.blocks[idx]
+            if layout._crossing_words(block[:4]):
+                metrics.count("blocks_clipped")
+                layout.clipped[idx] = page.get_text("words", clip=block[:4])
+        return layout
+
+    def renumbered(self, number):
+        """
+        The same page content at another position of the document (an
+        unchanged page reused from a previous version of the statement).
+        """
+        return PageLayout(number, self.rect, self.words, self.blocks, self.content_hash, self.clipped)
+
+    @property
+    def text(self):
+        """
+        Plain text of the page, equivalent to page.get_text() for marker searches.
+        """
+        return "".join(block[4] for block in self.blocks if block[6] == 0)
+
+    def has_stop_marker(self):
+        return any(LayoutConfig.STOP_PATTERN.search(block[4]) for block in self.blocks)
+
+    def _build_y_bins(self):
+        """
+        Spatial index over the page words: each word index is registered in
+        every horizontal band of Y_BIN_HEIGHT points that its bbox spans.
+        """
+        bin_height = LayoutConfig.Y_BIN_HEIGHT
+        bins = {}
+        for idx, w in enumerate(self.words):
+            for b in range(int(w[1] // bin_height), int(w[3] // bin_height) + 1):
+                bins.setdefault(b, []).append(idx)
+        self._y_bins = bins
+
+    def words_in_rect(self, rect):
+        """
+        Returns the whole words whose bbox touches `rect`, in extraction
+        order, without re-parsing the page. Not the same as
+        page.get_text("words", clip=rect) for a word that crosses the edge
+        of `rect`: clip cuts it per character ('ELLO' out of 'HELLO').
+        """
+        if self._y_bins is None:
+            self._build_y_bins()
+        x0, y0, x1, y1 = rect[:4]
+        bin_height = LayoutConfig.Y_BIN_HEIGHT
+
+        candidates = set()
+        for b in range(int(y0 // bin_height), int(y1 // bin_height) + 1):
+            candidates.update(self._y_bins.get(b, ()))
+
+        words = self.words
+        return [
+            words[idx] for idx in sorted(candidates)
+            if words[idx][0] < x1 and words[idx][2] > x0 and words[idx][1] < y1 and words[idx][3] > y0
+        ]
+
+    def _crossing_words(self, rect):
+        # Palabras que tocan `rect` (o quedan a menos de CLIP_MARGIN, por los glifos
+        # que sobresalen de su caja) sin estar contenidas en él.
+        x0, y0, x1, y1 = rect
+        margin = LayoutConfig.CLIP_MARGIN
+        return [w for w in self.words_in_rect((x0 - margin, y0 - margin, x1 + margin, y1 + margin))
+                if not (w[0] >= x0 and w[1] >= y0 and w[2] <= x1 and w[3] <= y1)]
+
+    def words_by_block(self):
+        """
+        Assigns the page words to each entry of `blocks` in a single pass over
+        the spatial index. Returns one list per block, in the same order,
+        with the coordinates and text page.get_text("words", clip=block)
+        gives: a block's own words lie inside its bbox, and blocks that other
+        words cross into come from `clipped`.
+        """
+        return [self.clipped[idx] if idx in self.clipped else self.words_in_rect(block[:4])
+                for idx, block in enumerate(self.blocks)]
+
+
+def _touching_blocks(blocks, margin):
+    """
+    Sorted indexes of the blocks whose bbox touches (within `margin`) the
+    bbox of another block: a word can only cross into a block if its own
+    block does. Sweep over the blocks sorted by y0.
+    """
+    order = sorted(range(len(blocks)), key=lambda i: blocks[i][1])
+    touching = set()
+    for pos, i in enumerate(order):
+        x0, _, x1, y1 = blocks[i][:4]
+        for j in order[pos + 1:]:
+            other = blocks[j]
+            if other[1] >= y1 + margin:
+                break
+            if other[0] < x1 + margin and other[2] > x0 - margin:
+                touching.update((i, j))
+    return sorted(touching)
+
+
+@metrics.timed("layout.group_lines")
+def group_words_into_lines(words, y_tolerance=LayoutConfig.LINE_Y_TOLERANCE):
+    """
+    Groups words into text lines by their y0, with the rules of the original
+    per-line scan: words are taken in extraction order, each one joins the
+    first line created whose key (the y0 of its first word) is less than
+    `y_tolerance` points away, or starts a new line keyed by its own y0.
+    Keys are therefore at least `y_tolerance` apart, so the candidates for a
+    word are the few keys found by bisection over the sorted keys:
+    O(n log n) instead of comparing every word against every line.
+
+    Returns the lines ordered by key (top to bottom), each one sorted by x0.
+    """
+    keys = []   # claves de línea, ordenadas
+    lines = {}  # clave -> (orden de creación, palabras)
+    for w in words:
+        y0 = w[1]
+        # Se arranca una clave antes y se termina una después de la ventana, y se
+        # compara con abs() como el recorrido original, por el redondeo de floats.
+        pos = max(bisect_left(keys, y0 - y_tolerance) - 1, 0)
+        found = None
+        while pos < len(keys) and keys[pos] <= y0 + y_tolerance:
+            key = keys[pos]
+            if abs(y0 - key) < y_tolerance and (found is None or lines[key][0] < lines[found][0]):
+                found = key
+            pos += 1
+        if found is None:
+            insort(keys, y0)
+            lines[y0] = (len(lines), [w])
+        else:
+            lines[found][1].append(w)
+    return [sorted(lines[key][1], key=lambda x: x[0]) for key in keys]
+
+
+class DocumentLayout:
+    """
+    Text layout of the planned pages of a PDF, keyed by the hash of its
+    content. Only pages [start, stop) are kept (see plan_page_range); they
+    are still indexed by their page number in the document. start is None
+    when the PDF has no START_MARKER page.
+    """
+    def __init__(self, pdf_hash, pages, start=0, stop=None, page_count=None):
+        self.pdf_hash = pdf_hash
+        self.pages = pages
+        self.start = start
+        self.stop = stop if stop is not None else (start or 0) + len(pages)
+        self.page_count = page_count if page_count is not None else self.stop
+
+    @property
+    def page_hashes(self):
+        return [page.content_hash for page in self.pages]
+
+    def __getitem__(self, page_num):
+        if self.start is None or not self.start <= page_num < self.stop:
+            raise IndexError(f"page {page_num} is outside the planned range")
+        return self.pages[page_num - self.start]
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+
+# --- Serialization ---
+def _pack_layout(layout):
+    """
+    Packs the page plan and the pages into a compact binary payload:
+    coordinates go into double arrays and numbering into int arrays,
+    instead of one tuple per word.
+    """
+    packed = []
+    for p in layout.pages:
+        word_coords = array("d", (c for w in p.words for c in w[:4]))
+        word_ids = array("i", (n for w in p.words for n in w[5:8]))
+        block_coords = array("d", (c for b in p.blocks for c in b[:4]))
+        block_ids = array("i", (n for b in p.blocks for n in b[5:7]))
+        packed.append((
+            p.number,
+            p.rect,
+            word_coords.tobytes(),
+            word_ids.tobytes(),
+            [w[4] for w in p.words],
+            block_coords.tobytes(),
+            block_ids.tobytes(),
+            [b[4] for b in p.blocks],
+            p.content_hash,
+            p.clipped,
+        ))
+    plan = (layout.start, layout.stop, layout.page_count)
+    payload = pickle.dumps((LayoutConfig.FORMAT_VERSION, fitz.VersionBind, plan, packed), protocol=pickle.HIGHEST_PROTOCOL)
+    return zlib.compress(payload)
+
+
+def _unpack_layout(pdf_hash, data):
+    """
+    Inverse of _pack_layout. Returns None if the payload was written by another
+    format version or PyMuPDF version.
+    """
+    version, pymupdf_version, *payload = pickle.loads(zlib.decompress(data))
+    if version != LayoutConfig.FORMAT_VERSION or pymupdf_version != fitz.VersionBind:
+        return None
+    (start, stop, page_count), packed = payload
+
+    pages = []
+    for number, rect, wc_bytes, wi_bytes, word_texts, bc_bytes, bi_bytes, block_texts, content_hash, clipped in packed:
+        wc, wi, bc, bi = array("d"), array("i"), array("d"), array("i")
+        wc.frombytes(wc_bytes)
+        wi.frombytes(wi_bytes)
+        bc.frombytes(bc_bytes)
+        bi.frombytes(bi_bytes)
+        words = [
+            (wc[4*k], wc[4*k + 1], wc[4*k + 2], wc[4*k + 3], text, wi[3*k], wi[3*k + 1], wi[3*k + 2])
+            for k, text in enumerate(word_texts)
+        ]
+        blocks = [
+            (bc[4*k], bc[4*k + 1], bc[4*k + 2], bc[4*k + 3], text, bi[2*k], bi[2*k + 1])
+            for k, text in enumerate(block_texts)
+        ]
+        pages.append(PageLayout(number, rect, words, blocks, content_hash, clipped))
+    return DocumentLayout(pdf_hash, pages, start, stop, page_count)
+
+
+# --- Cache Access ---
+def pdf_content_hash(pdf_path):
+    """
+    SHA-256 of the PDF bytes. Two copies of the same statement share a cache entry.
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(LayoutConfig.HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Referencia indirecta en el código fuente de un objeto PDF ("12 0 R").
+_REFERENCE = re.compile(r"\b(\d+) (\d+) R\b")
+
+
+def page_content_hash(page, object_digests=None):
+    """
+    SHA-256 of a page's content stream, page box and resources. A page of a
+    reissued statement with the same hash has the same text and renders the
+    same, even if other pages (or the file as a whole) changed.
+
+    The resources (fonts, Form XObjects, images) are hashed by content,
+    recursively: a page that only draws a Form XObject ("q /fzFrm0 Do Q")
+    changes its hash when the XObject does. `object_digests` memoizes the
+    digest of each object across the pages of one document.
+    """
+    doc = page.parent
+    if object_digests is None:
+        object_digests = {}
+    digest = hashlib.sha256(page.read_contents())
+    digest.update(repr((tuple(page.rect), page.rotation)).encode("ascii"))
+    digest.update(_page_resources(doc, page.xref, object_digests).encode("ascii"))
+    return digest.hexdigest()
+
+
+def _page_resources(doc, page_xref, object_digests):
+    # /Resources puede heredarse de un nodo /Pages ancestro.
+    xref = page_xref
+    while True:
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null":
+            break
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            return ""
+        xref = int(parent.split()[0])
+    return _resolve_references(doc, value, object_digests, set())
+
+
+def _resolve_references(doc, source, object_digests, visiting):
+    """
+    `source` (PDF object syntax) with every indirect reference replaced by
+    the digest of the referenced object, so the result depends on content
+    and not on object numbers.
+    """
+    return _REFERENCE.sub(lambda m: _object_digest(doc, int(m.group(1)), object_digests, visiting), source)
+
+
+def _object_digest(doc, xref, object_digests, visiting):
+    if xref in object_digests:
+        return object_digests[xref]
+    if xref in visiting:
+        return "R"  # Referencia circular: su contenido ya entra por el otro extremo.
+    visiting.add(xref)
+    digest = hashlib.sha256(_resolve_references(doc, doc.xref_object(xref, compressed=True),
+                                                object_digests, visiting).encode("utf-8", "surrogateescape"))
+    if doc.xref_is_stream(xref):
+        digest.update(doc.xref_stream(xref) or b"")
+    visiting.discard(xref)
+    object_digests[xref] = digest.hexdigest()
+    return object_digests[xref]
+
+
+def _cache_path(cache_dir, pdf_hash):
+    return os.path.join(cache_dir, pdf_hash + LayoutConfig.CACHE_EXTENSION)
+
+
+def extract_page_layouts(pdf_path, start=0, stop=None):
+    """
+    Runs the PyMuPDF text extraction for pages [start, stop) of `pdf_path`.
+    Used on cache misses for the page range assigned to a worker process.
+    """
+    with metrics.span("pdf.open"):
+        doc = fitz.open(pdf_path)
+    with doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        return [PageLayout.from_page(doc.load_page(i)) for i in range(start, stop)]
+
+
+def read_cached_layout(pdf_hash, cache_dir=LayoutConfig.CACHE_DIR):
+    """
+    Returns the cached DocumentLayout for `pdf_hash`, or None on a miss.
+    """
+    if not cache_dir:
+        return None
+    path = _cache_path(cache_dir, pdf_hash)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return _unpack_layout(pdf_hash, f.read())
+    except (OSError, ValueError, zlib.error, pickle.UnpicklingError, EOFError):
+        return None  # Caché corrupta o incompleta: se regenera.
+
+
+def write_cached_layout(layout, cache_dir=LayoutConfig.CACHE_DIR):
+    """
+    Stores `layout` in `cache_dir` atomically.
+    """
+    if not cache_dir:
+        return
+    path = _cache_path(cache_dir, layout.pdf_hash)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Archivo temporal por proceso: varios workers del modo lote pueden escribir a la vez.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_pack_layout(layout))
+    os.replace(tmp_path, path)
+
+    pointer_path = os.path.join(cache_dir, LayoutConfig.LATEST_POINTER)
+    with open(f"{pointer_path}.{os.getpid()}.tmp", "w", encoding="ascii") as f:
+        f.write(layout.pdf_hash)
+    os.replace(f"{pointer_path}.{os.getpid()}.tmp", pointer_path)
+
+
+def read_latest_layout(cache_dir=LayoutConfig.CACHE_DIR):
+    """
+    Returns the layout written most recently to `cache_dir` (usually the
+    previous version of the statement being processed), or None.
+    """
+    if not cache_dir:
+        return None
+    try:
+        with open(os.path.join(cache_dir, LayoutConfig.LATEST_POINTER), encoding="ascii") as f:
+            pdf_hash = f.read().strip()
+    except OSError:
+        return None
+    return read_cached_layout(pdf_hash, cache_dir) if pdf_hash else None
+
+
+# --- Page Planning ---
+def _is_start_page(page, textpage):
+    return LayoutConfig.START_MARKER in page.get_text("text", textpage=textpage)
+
+
+def page_markers(page):
+    """
+    (has START_MARKER, has STOP_PATTERN) for a PageLayout, the two facts
+    plan_page_range needs from each page.
+    """
+    return LayoutConfig.START_MARKER in page.text, page.has_stop_marker()
+
+
+def plan_page_range(markers):
+    """
+    Finds the [start, stop) range of pages the extractors need from the
+    page_markers of every page, in page order: start is the first page with
+    START_MARKER and stop follows the first page with the legal notices
+    (STOP_PATTERN) from there on.
+    Returns (None, page_count) when there is no START_MARKER page.
+    """
+    start = None
+    for i, (is_start, is_stop) in enumerate(markers):
+        if start is None and is_start:
+            start = i
+        if start is not None and is_stop:
+            return start, i + 1
+    return start, len(markers)
+
+
+def extract_layout(document, pdf_hash, base_layout=None, incremental=False):
+    """
+    Plans and extracts in a single pass: pages before the START_MARKER page
+    only get the plain text search, pages from there on are extracted
+    (sharing the search's TextPage), and the pass ends after the page with
+    the legal notices, so no later page is loaded.
+
+    With incremental=True every page is hashed, and pages whose hash
+    appears in `base_layout` are reused from it instead of being extracted.
+    """
+    reusable = {}
+    if base_layout is not None:
+        reusable = {page.content_hash: page for page in base_layout if page.content_hash}
+
+    start, pages = None, []
+    object_digests = {}  # Fuentes y XObjects compartidos se hashean una sola vez.
+    for i in range(document.page_count):
+        page = document.load_page(i)
+        content_hash = page_content_hash(page, object_digests) if incremental else None
+        page_layout = reusable.get(content_hash) if content_hash else None
+        if page_layout is not None:
+            page_layout = page_layout.renumbered(i)
+            metrics.count("pages_reused")
+
+        textpage = None
+        if start is None:
+            if page_layout is not None:
+                is_start = LayoutConfig.START_MARKER in page_layout.text
+            else:
+                textpage = page.get_textpage(flags=fitz.TEXTFLAGS_WORDS)
+                is_start = _is_start_page(page, textpage)
+            if not is_start:
+                continue
+            start = i
+
+        if page_layout is None:
+            page_layout = PageLayout.from_page(page, content_hash, textpage)
+        pages.append(page_layout)
+        if page_layout.has_stop_marker():
+            return DocumentLayout(pdf_hash, pages, start, i + 1, document.page_count)
+    return DocumentLayout(pdf_hash, pages, start, document.page_count, document.page_count)
+
+
+def load_layout(pdf_path, cache_dir=LayoutConfig.CACHE_DIR, document=None, incremental=False):
+    """
+    Returns the DocumentLayout for `pdf_path`. On a cache hit the PDF is not
+    opened at all; on a miss every page is extracted once and the result is
+    written to `cache_dir`. Pass cache_dir=None to skip the disk cache.
+    If `document` (the already open fitz.Document of pdf_path) is given, a
+    miss reads the pages from it instead of opening the file again.
+    Only the planned pages are extracted (see extract_layout). With
+    incremental=True a miss only extracts the pages that are not in the
+    latest cached layout.
+    """
+    pdf_hash = pdf_content_hash(pdf_path)
+    layout = read_cached_layout(pdf_hash, cache_dir)
+    if incremental and layout is not None and None in layout.page_hashes:
+        layout = None  # Escrita fuera del modo incremental: no tiene hashes por página.
+    if layout is None:
+        base_layout = read_latest_layout(cache_dir) if incremental else None
+        if document is not None:
+            layout = extract_layout(document, pdf_hash, base_layout, incremental)
+        else:
+            with metrics.span("pdf.open"):
+                doc = fitz.open(pdf_path)
+            with doc:
+                layout = extract_layout(doc, pdf_hash, base_layout, incremental)
+        write_cached_layout(layout, cache_dir)
+    return layout
@@ -0,0 +1,58 @@
+import pytest
+
+from Envio_Automatico_Detalle import DirectorioVendedores, normalizar_nombre
+
+VENDEDORES = {
+    "Ana B Acosta": {"UID": "U001", "send_message": True},
+    "Juan R Perez": {"UID": "U002", "send_message": True},
+    "Germán C. Celis": {"UID": "U003", "send_message": True},
+    "Carlos Roldan": {"UID": "U004", "send_message": True},
+    "_comment_Lucas Brusa": "Ya no trabaja en la empresa",
+}
+
+
+@pytest.fixture
+def directorio():
+    return DirectorioVendedores(VENDEDORES)
+
+
+def test_normalizar_nombre_forgives_accents_case_dots_and_spacing():
+    assert normalizar_nombre("  Germán   c. Celis ") == "GERMAN C CELIS"
+
+
+@pytest.mark.parametrize("nombre, clave", [
+    ("ANA B ACOSTA", "Ana B Acosta"),
+    ("GERMAN C CELIS", "Germán C. Celis"),
+    ("germán  c celis", "Germán C. Celis"),
+    ("Juan R. Pérez", "Juan R Perez"),
+])
+def test_buscar_matches_accent_case_and_spacing_variants(directorio, nombre, clave):
+    info, clave_encontrada = directorio.buscar(nombre)
+    assert clave_encontrada == clave
+    assert info == VENDEDORES[clave]
+    assert directorio.no_encontrados == []
+
+
+@pytest.mark.parametrize("nombre", [
+    "ANA A ACOSTA",      # otra inicial: otra persona
+    "JUAN P PEREZ",
+    "ANA ACOSTA",        # falta la inicial
+    "C ROLDAN",          # inicial en lugar del nombre
+    "CARLOS ROLDAN GOMEZ",
+    "GERMAN C CELIZ",    # una letra distinta
+])
+def test_buscar_does_not_guess_near_miss_names(directorio, nombre):
+    assert directorio.buscar(nombre) == (None, None)
+    assert directorio.no_encontrados == [nombre]
+
+
+def test_near_miss_is_reported_once(directorio):
+    directorio.buscar("ANA A ACOSTA")
+    directorio.buscar("ANA A ACOSTA")
+    assert directorio.no_encontrados == ["ANA A ACOSTA"]
+
+
+def test_omitted_vendor_is_not_reported_as_missing(directorio):
+    assert directorio.buscar("LUCAS BRUSA") == (None, None)
+    assert directorio.es_omitido("Lucas Brusa")
+    assert directorio.no_encontrados == []
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from pdf_layout import group_words_into_lines
+
+
+def _word(text, y0, x0=0.0):
+    return (x0, y0, x0 + 10, y0 + 9, text, 0, 0, 0)
+
+
+def _per_line_scan(words, y_tolerance=5):
+    # El agrupamiento original: cada palabra contra las líneas ya creadas, en orden.
+    lines = {}
+    for w in words:
+        for key in lines:
+            if abs(w[1] - key) < y_tolerance:
+                lines[key].append(w)
+                break
+        else:
+            lines[w[1]] = [w]
+    return [sorted(lines[key], key=lambda x: x[0]) for key in sorted(lines)]
+
+
+def _texts(lines):
+    return [[w[4] for w in line] for line in lines]
+
+
+def test_word_joins_the_line_of_the_first_word_within_tolerance():
+    # 104 y 96 están a menos de 5 pt de 100 (aunque entre sí estén a 8): una sola línea.
+    words = [_word("a", 100, 0), _word("b", 104, 20), _word("c", 96, 40)]
+    assert _texts(group_words_into_lines(words, 5)) == [["a", "b", "c"]]
+
+
+@pytest.mark.parametrize("y0, expected", [
+    (104.999, [["a", "b"]]),
+    (105, [["a"], ["b"]]),
+    (95.001, [["a", "b"]]),
+    (95, [["b"], ["a"]]),
+])
+def test_tolerance_is_strict(y0, expected):
+    words = [_word("a", 100, 0), _word("b", y0, 20)]
+    assert _texts(group_words_into_lines(words, 5)) == expected
+
+
+def test_earliest_line_wins_when_two_are_in_range():
+    # 'c' está a menos de 5 pt de las dos líneas: va a la creada primero.
+    words = [_word("a", 106, 0), _word("b", 100, 0), _word("c", 103, 20)]
+    assert _texts(group_words_into_lines(words, 5)) == [["b"], ["a", "c"]]
+
+
+def test_matches_per_line_scan_on_jittered_rows():
+    rng = random.Random(0)
+    for _ in range(200):
+        words = [_word(f"w{i}", rng.choice([40, 52, 57, 64]) + rng.uniform(-3, 3), rng.uniform(0, 500))
+                 for i in range(rng.randint(1, 40))]
+        assert group_words_into_lines(words, 5) == _per_line_scan(words)
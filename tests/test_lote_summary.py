@@ -0,0 +1,34 @@
+import pandas as pd
+
+from pdf_extractos_Lote import _summarize_dataframe
+
+
+def _dataframe(rows):
+    return pd.DataFrame(rows, columns=["FECHA", "DESCRIPCIÓN", "PESOS", "DÓLARES"])
+
+
+def test_totals_of_repeated_salesperson_are_added():
+    dataframe = _dataframe([
+        ["FECHA", "DESCRIPCIÓN", "PESOS", "DÓLARES"],
+        ["01-Mar-25", "MERCHANT 1", 100.0, ""],
+        ["", "TOTAL CONSUMOS DE T AGRESTA GREPPI 100,00 0,00", 100.0, 0.0],
+        ["02-Mar-25", "MERCHANT 2", 50.5, ""],
+        ["", "TOTAL CONSUMOS DE C ROLDAN 50,50 0,00", 50.5, 0.0],
+        ["03-Mar-25", "MERCHANT 3", 25.25, 10.0],
+        ["", "TOTAL CONSUMOS DE T AGRESTA GREPPI 25,25 10,00", 25.25, 10.0],
+    ])
+    transactions, totals = _summarize_dataframe(dataframe)
+    assert transactions == 3
+    assert totals == {
+        "T AGRESTA GREPPI": {"PESOS": 125.25, "DÓLARES": 10.0},
+        "C ROLDAN": {"PESOS": 50.5, "DÓLARES": 0.0},
+    }
+
+
+def test_missing_amounts_stay_none():
+    dataframe = _dataframe([
+        ["", "TOTAL CONSUMOS DE ANA ACOSTA 0,00", "", ""],
+        ["", "TOTAL CONSUMOS DE ANA ACOSTA 10,00", 10.0, ""],
+    ])
+    _, totals = _summarize_dataframe(dataframe)
+    assert totals == {"ANA ACOSTA": {"PESOS": 10.0, "DÓLARES": None}}
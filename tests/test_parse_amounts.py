@@ -0,0 +1,36 @@
+import math
+
+import pytest
+
+from pdf_extractos_Excel_txt import parse_amounts
+
+
+def _row_by_row(raw):
+    # El parseo original, fila por fila.
+    if not raw:
+        return raw
+    amount_str = str(raw).replace('.', '').replace(',', '.')
+    if amount_str.endswith('-'):
+        amount_str = '-' + amount_str[:-1]
+    try:
+        return float(amount_str)
+    except ValueError:
+        return ""
+
+
+RAW_AMOUNTS = ["1.234,56", "1.234,56-", "225,13-", "100", "1.000", "0", "",
+               "nan", "inf", "1_000", " 12,5 ", "1e3", "abc", "--", "12,3,4"]
+
+
+def test_matches_row_by_row_parsing():
+    for raw, parsed in zip(RAW_AMOUNTS, parse_amounts(RAW_AMOUNTS)):
+        expected = _row_by_row(raw)
+        if isinstance(expected, float) and math.isnan(expected):
+            assert isinstance(parsed, float) and math.isnan(parsed), raw
+        else:
+            assert parsed == expected and type(parsed) is type(expected), raw
+
+
+@pytest.mark.parametrize("raw", [["100", "1.000", "25"], ["7"]])
+def test_integer_columns_stay_float(raw):
+    assert all(type(value) is float for value in parse_amounts(raw))
@@ -0,0 +1,110 @@
+import fitz  # PyMuPDF
+import pytest
+
+from pdf_layout import PageLayout, extract_layout, load_layout, page_content_hash
+
+# "ﬁ" es una sola ligadura (U+FB01) y el tab separa dos palabras: sin los flags
+# de get_text() ambas cosas cambian ('ofice x' como una sola palabra).
+TEXT = "oﬁce\tx  DETALLE"
+
+
+@pytest.fixture
+def document():
+    doc = fitz.open()
+    doc.new_page()  # portada: antes del marcador de inicio
+    page = doc.new_page()
+    # Droid Sans Fallback viene con PyMuPDF y tiene el glifo de la ligadura.
+    page.insert_font(fontname="F0", fontbuffer=fitz.Font("cjk").buffer)
+    page.insert_text((50, 100), TEXT, fontsize=11, fontname="F0")
+    page.insert_text((50, 130), "a\tb", fontsize=11, fontname="F0")
+    yield doc
+    doc.close()
+
+
+def _expected(page):
+    return page.get_text("words"), page.get_text("blocks")
+
+
+def test_from_page_keeps_whitespace_and_ligatures(document):
+    page = document.load_page(1)
+    layout = PageLayout.from_page(page)
+    words, blocks = _expected(page)
+    assert [w[4] for w in layout.words][:2] == ["oﬁce", "x"]
+    assert "b" in [w[4] for w in layout.words]
+    assert list(layout.words) == words
+    assert list(layout.blocks) == blocks
+
+
+def test_extract_layout_shares_textpage_without_changing_text(document):
+    layout = extract_layout(document, "test")
+    assert layout.start == 1
+    words, blocks = _expected(document.load_page(1))
+    assert list(layout[1].words) == words
+    assert list(layout[1].blocks) == blocks
+
+
+def test_cached_layout_matches_get_text(document, tmp_path):
+    pdf_path = tmp_path / "statement.pdf"
+    document.save(pdf_path)
+    load_layout(str(pdf_path), cache_dir=str(tmp_path / "cache"))
+    cached = load_layout(str(pdf_path), cache_dir=str(tmp_path / "cache"))
+    words, blocks = _expected(document.load_page(1))
+    assert list(cached[1].words) == words
+    assert list(cached[1].blocks) == blocks
+
+
+def _wrapped_page(text):
+    # Página que solo dibuja un Form XObject: su content stream es "q /fzFrm0 Do Q"
+    # sea cual sea el texto de adentro.
+    source = fitz.open()
+    source.new_page().insert_text((50, 100), text)
+    doc = fitz.open()
+    page = doc.new_page()
+    page.show_pdf_page(page.rect, source, 0)
+    return doc
+
+
+def test_page_hash_covers_form_xobjects():
+    first, second, same = _wrapped_page("DETALLE uno"), _wrapped_page("DETALLE dos"), _wrapped_page("DETALLE uno")
+    assert first[0].read_contents() == second[0].read_contents()
+    assert page_content_hash(first[0]) != page_content_hash(second[0])
+    assert page_content_hash(first[0]) == page_content_hash(same[0])
+
+
+def test_incremental_layout_does_not_reuse_page_with_changed_xobject():
+    base = extract_layout(_wrapped_page("DETALLE uno"), "v1", incremental=True)
+    reissue = extract_layout(_wrapped_page("DETALLE dos"), "v2", base_layout=base, incremental=True)
+    assert [w[4] for w in reissue[0].words] == ["DETALLE", "dos"]
+
+
+@pytest.fixture
+def overlapping_blocks():
+    # Tres bloques: el último ("ZZ") queda encima de 'HELLO', que lo cruza.
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 100), "HELLO 1.234,56", fontsize=11)
+    page.insert_text((300, 500), "DETALLE", fontsize=11)
+    page.insert_text((62, 97), "ZZ", fontsize=6)
+    yield doc
+    doc.close()
+
+
+def test_words_by_block_matches_clip_with_overlapping_blocks(overlapping_blocks, tmp_path):
+    page = overlapping_blocks.load_page(0)
+    # Coordenadas y texto: los números de bloque/línea de un recorte son relativos a él.
+    expected = [[w[:5] for w in page.get_text("words", clip=block[:4])] for block in page.get_text("blocks")]
+    assert [w[4] for w in expected[2]] == ["EL", "ZZ"]  # PyMuPDF recorta por carácter
+
+    layout = PageLayout.from_page(page)
+    assert [[w[:5] for w in words] for words in layout.words_by_block()] == expected
+    # Lo mismo al leerlo de la caché.
+    pdf_path = tmp_path / "overlap.pdf"
+    overlapping_blocks.save(pdf_path)
+    load_layout(str(pdf_path), cache_dir=str(tmp_path / "cache"))
+    cached = load_layout(str(pdf_path), cache_dir=str(tmp_path / "cache"))
+    assert [[w[:5] for w in words] for words in cached[0].words_by_block()] == expected
+
+
+def test_words_in_rect_returns_whole_words(overlapping_blocks):
+    layout = PageLayout.from_page(overlapping_blocks.load_page(0))
+    assert [w[4] for w in layout.words_in_rect((57.2, 0, 80, 200))] == ["HELLO", "ZZ"]
@@ -0,0 +1,36 @@
+import fitz  # PyMuPDF
+
+from pdf_extractos_Excel_txt import PAGES_PER_TASK, _tokenize_document
+from pdf_layout import pdf_content_hash, read_cached_layout
+
+
+def _statement(path):
+    # Portada, DETALLE, páginas de consumos, legales y un anexo después del corte.
+    texts = ["Portada", "DETALLE"] + [f"Consumos {i}" for i in range(PAGES_PER_TASK)]
+    texts += ["Legales y avisos", "Anexo DETALLE"]
+    doc = fitz.open()
+    for text in texts:
+        doc.new_page().insert_text((50, 100), text)
+    doc.save(path)
+    doc.close()
+    return len(texts)
+
+
+def _tokenize_in(directory, monkeypatch, pdf_path, workers):
+    # La caché de layout es relativa al directorio actual: una por corrida.
+    directory.mkdir()
+    monkeypatch.chdir(directory)
+    return _tokenize_document(pdf_path, workers=workers), read_cached_layout(pdf_content_hash(pdf_path))
+
+
+def test_parallel_extraction_is_trimmed_to_the_planned_range(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / "statement.pdf")
+    page_count = _statement(pdf_path)
+
+    serial_events, serial = _tokenize_in(tmp_path / "serial", monkeypatch, pdf_path, 1)
+    parallel_events, parallel = _tokenize_in(tmp_path / "parallel", monkeypatch, pdf_path, 2)
+
+    assert (parallel.start, parallel.stop, parallel.page_count) == (1, page_count - 1, page_count)
+    assert (serial.start, serial.stop) == (parallel.start, parallel.stop)
+    assert [page.number for page in parallel] == list(range(1, page_count - 1))
+    assert parallel_events == serial_events
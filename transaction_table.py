@@ -0,0 +1,90 @@
+from array import array
+
+# --- Row Types ---
+ROW_TRANSACTION = 0
+ROW_TOTAL = 1
+ROW_TYPE_NAMES = ("TRANSACTION", "TOTAL")
+
+
+# --- Column Buffers ---
+class SalespersonRows:
+    """
+    Rows of one salesperson stored as column buffers: one list per output
+    column plus a compact array with the type of each row, instead of one
+    dict per row.
+    """
+    __slots__ = ("name", "columns", "types")
+
+    def __init__(self, name, column_count):
+        self.name = name
+        self.columns = [[] for _ in range(column_count)]
+        self.types = array("b")
+
+    def append(self, row_type, values):
+        for buffer, value in zip(self.columns, values):
+            buffer.append(value)
+        self.types.append(row_type)
+
+    def __len__(self):
+        return len(self.types)
+
+
+class TransactionTable:
+    """
+    Every row of a statement, grouped by salesperson in order of first
+    appearance (repeated sections of the same name share one buffer).
+    pandas is imported only when the table is turned into a DataFrame.
+    """
+    __slots__ = ("column_names", "salespeople")
+
+    def __init__(self, column_names):
+        self.column_names = list(column_names)
+        self.salespeople = {}  # nombre -> SalespersonRows
+
+    def add_salesperson(self, name):
+        if name not in self.salespeople:
+            self.salespeople[name] = SalespersonRows(name, len(self.column_names))
+        return self.salespeople[name]
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.salespeople.values())
+
+    def column(self, col):
+        """
+        All values of `col`, concatenated in salesperson order.
+        """
+        col_idx = self.column_names.index(col)
+        return [value for rows in self.salespeople.values() for value in rows.columns[col_idx]]
+
+    def replace_column(self, col, values):
+        """
+        Inverse of column(): splits `values` back into the salesperson buffers.
+        """
+        col_idx = self.column_names.index(col)
+        start = 0
+        for rows in self.salespeople.values():
+            stop = start + len(rows)
+            rows.columns[col_idx] = values[start:stop]
+            start = stop
+
+    def to_dataframe(self):
+        """
+        The statement as the exporters expect it: for each salesperson a
+        '--- Consumos NAME ---' heading, a row with the column names, their
+        rows, and a blank row after every TOTAL. Built column by column.
+        """
+        # Importado acá: el armado de filas no necesita pandas, solo la exportación.
+        import pandas as pd
+
+        data = {}
+        for col_idx, col in enumerate(self.column_names):
+            out = []
+            for name, rows in self.salespeople.items():
+                out.append(f"--- Consumos {name} ---" if col == "DESCRIPCIÓN" else "")
+                out.append(col)
+                for value, row_type in zip(rows.columns[col_idx], rows.types):
+                    out.append(value)
+                    if row_type == ROW_TOTAL:
+                        out.append("")
+            data[col] = out
+        return pd.DataFrame(data, columns=self.column_names)